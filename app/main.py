@@ -3,6 +3,8 @@ Application principale Tchad Langues AI
 Interface gamifiée pour apprendre les langues du Tchad
 """
 
+import sys
+import uuid
 import streamlit as st
 import yaml
 from pathlib import Path
@@ -12,12 +14,74 @@ from datetime import datetime
 BASE_DIR = Path(__file__).parent.parent
 CONFIG_FILE = BASE_DIR / "config.yaml"
 
+sys.path.insert(0, str(BASE_DIR / "scripts" / "data_processing"))
+sys.path.insert(0, str(BASE_DIR / "scripts" / "inference"))
+from lexicon_store import LexiconStore, STORE_FILE
+from fuzzy_index import TrigramIndex, FIELD_FRENCH
+from autocomplete import Autocomplete, AUTOCOMPLETE_FILE
+
 # Charger la configuration
 @st.cache_data
 def load_config():
     with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
         return yaml.safe_load(f)
 
+# Charger le lexique une seule fois par processus (partagé entre les sessions)
+@st.cache_resource
+def load_lexicon():
+    """
+    Ouvre le lexique indexé (memory mapping) ; None s'il n'a pas encore été construit
+    ou s'il est illisible (ancienne version du format : à reconstruire)
+    """
+    if not STORE_FILE.exists():
+        return None
+    try:
+        return LexiconStore(STORE_FILE)
+    except ValueError as e:
+        print(f"ATTENTION - {e}")
+        return None
+
+@st.cache_resource
+def load_fuzzy_index():
+    """Index de trigrammes pour la recherche tolérante (accents, fautes de frappe)"""
+    lexicon = load_lexicon()
+    if lexicon is None:
+        return None
+    return TrigramIndex.from_store(lexicon)
+
+@st.cache_resource
+def load_autocomplete():
+    """
+    Trie d'autocomplétion (rechargé depuis le disque s'il a été construit)
+    Reconstruit et réécrit si le lexique a changé depuis sa construction
+    """
+    lexicon = load_lexicon()
+    if AUTOCOMPLETE_FILE.exists():
+        autocomplete = Autocomplete.load(AUTOCOMPLETE_FILE)
+        if lexicon is None or not autocomplete.is_stale(lexicon.path):
+            return autocomplete
+    if lexicon is None:
+        return None
+    autocomplete = Autocomplete.from_store(lexicon)
+    autocomplete.save(AUTOCOMPLETE_FILE)
+    return autocomplete
+
+@st.cache_resource
+def load_chat_engine():
+    """
+    Modèle de conversation partagé entre les sessions (caches KV par session)
+    None si le modèle fine-tuné n'existe pas encore ou si torch n'est pas installé
+    """
+    try:
+        from chat_engine import ChatEngine
+        from inference_engine import get_model_dir
+    except ImportError:
+        return None
+    config = load_config()
+    if not get_model_dir(config).exists():
+        return None
+    return ChatEngine.from_config(config)
+
 # Initialisation de la session
 def init_session_state():
     """Initialise les variables de session"""
@@ -34,6 +98,10 @@ def init_session_state():
     
     if 'current_character' not in st.session_state:
         st.session_state.current_character = 'Neloumta'
+    
+    if 'chat_session_id' not in st.session_state:
+        st.session_state.chat_session_id = str(uuid.uuid4())
+        st.session_state.chat_messages = []
 
 # Styles CSS personnalisés
 def load_custom_css():
@@ -170,6 +238,84 @@ def display_character_message(character_name, message=None):
     </div>
     """, unsafe_allow_html=True)
 
+def display_dictionary(lang):
+    """Affiche la recherche Français → Sara dans le lexique"""
+    st.subheader("🔎 Dictionnaire Français → Sara")
+    
+    lexicon = load_lexicon()
+    if lexicon is None:
+        st.info("Le dictionnaire n'est pas encore disponible. Lance : python scripts/data_processing/lexicon_store.py")
+        return
+    
+    query = st.text_input("Comment dit-on... ?", key="dictionary_query", placeholder="ex : maison")
+    if not query.strip():
+        return
+    
+    # Suggestions en français et en Sara pour le début de mot saisi
+    completions = load_autocomplete().complete(query, limit=8)
+    if completions:
+        st.caption("Suggestions : " + " · ".join(
+            f"{form} ({'FR' if field == FIELD_FRENCH else 'Sara'})" for form, field, _ in completions
+        ))
+    
+    french_id = lexicon.find(query)
+    if french_id is None:
+        # Recherche tolérante : "a cote de" trouve "à côté de"
+        matches = load_fuzzy_index().search(query, k=8, field=FIELD_FRENCH)
+        if matches and matches[0][0] == 1.0:
+            french_id = matches[0][1]
+        else:
+            suggestions = [lexicon.french(match[1]) for match in matches]
+            suggestions += [lexicon.french(i) for i in lexicon.prefix(query, limit=8)
+                            if lexicon.french(i) not in suggestions]
+            if suggestions:
+                st.write("Tu voulais dire : " + ", ".join(f"**{word}**" for word in suggestions[:8]))
+            else:
+                st.warning(f"« {query} » n'est pas encore dans le lexique.")
+            return
+    
+    # Formes du dialecte choisi d'abord, sinon toutes les formes connues
+    dialect = lang.get('lexicon_code')
+    forms = lexicon.forms_at(french_id, dialect) if dialect else []
+    if forms:
+        st.success(f"**{lexicon.french(french_id)}** en {lang['name']} : " + ", ".join(f"**{form}**" for _, form in forms))
+    else:
+        all_forms = lexicon.forms_at(french_id)
+        st.success(f"**{lexicon.french(french_id)}** en Sara : " + ", ".join(
+            f"**{form}**" + (f" ({code})" if code else "") for code, form in all_forms
+        ))
+
+def display_chat(character):
+    """Conversation avec un personnage, réponse affichée au fil de la génération"""
+    st.subheader(f"💬 Discute avec {character['name']}")
+    
+    engine = load_chat_engine()
+    if engine is None:
+        st.info("La conversation sera disponible après l'entraînement du modèle "
+                "(python scripts/training/fine_tune_llm.py).")
+        return
+    
+    # La conversation recommence si l'on change de personnage
+    if st.session_state.get('chat_character') != character['name']:
+        st.session_state.chat_character = character['name']
+        st.session_state.chat_messages = [('assistant', character['greetings'][0])]
+        engine.reset(st.session_state.chat_session_id)
+    
+    for role, text in st.session_state.chat_messages:
+        with st.chat_message(role, avatar=character['avatar'] if role == 'assistant' else None):
+            st.markdown(text)
+    
+    message = st.chat_input("Écris ton message...")
+    if message:
+        st.session_state.chat_messages.append(('user', message))
+        with st.chat_message('user'):
+            st.markdown(message)
+        with st.chat_message('assistant', avatar=character['avatar']):
+            reply = st.write_stream(
+                engine.stream_reply(st.session_state.chat_session_id, character, message)
+            )
+        st.session_state.chat_messages.append(('assistant', reply))
+
 def main():
     """Fonction principale"""
     st.set_page_config(
@@ -189,7 +335,7 @@ def main():
         # Menu principal
         page = st.radio(
             "Navigation",
-            ["🏠 Accueil", "📚 Apprendre", "👥 Personnages"]
+            ["🏠 Accueil", "📚 Apprendre", "💬 Conversation", "👥 Personnages"]
         )
         
         st.markdown("---")
@@ -263,6 +409,21 @@ def main():
                         if st.button(f"{'✅' if is_completed else '📖'} {lesson}", 
                                    key=f"lesson_{level_info['level']}_{lesson}"):
                             st.success(f"Leçon '{lesson}' sélectionnée ! (Les exercices seront disponibles bientôt)")
+            
+            st.markdown("---")
+            display_dictionary(lang)
+    
+    elif page == "💬 Conversation":
+        display_header(config)
+        characters = config['characters']
+        # Nouba (ami virtuel) par défaut
+        character_names = [c['name'] for c in characters]
+        selected_name = st.selectbox(
+            "Avec qui veux-tu parler ?",
+            character_names,
+            index=character_names.index('Nouba') if 'Nouba' in character_names else 0
+        )
+        display_chat(next(c for c in characters if c['name'] == selected_name))
     
     elif page == "👥 Personnages":
         display_header(config)
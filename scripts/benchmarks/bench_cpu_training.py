@@ -0,0 +1,127 @@
+"""
+Benchmark « smoke » de l'entraînement en mode CPU (sans GPU, sans téléchargement)
+Entraîne un tout petit modèle Llama aléatoire avec LoRA sur des exemples synthétiques
+formatés comme le lexique, et mesure le débit en exemples/seconde
+Usage: python scripts/benchmarks/bench_cpu_training.py [nombre_d_exemples]
+"""
+
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts" / "training"))
+
+import torch
+from datasets import Dataset
+from peft import LoraConfig, get_peft_model
+from transformers import LlamaConfig, LlamaForCausalLM, default_data_collator
+
+from fine_tune_llm import (
+    format_training_text, pack_sequences, resolve_precision,
+    build_training_arguments, StatsTrainer, TokenStats
+)
+
+DEFAULT_NUM_EXAMPLES = 512
+MAX_LENGTH = 128
+# Tokens "octets" : 256 valeurs + BOS, EOS et PAD
+BOS_ID, EOS_ID, PAD_ID = 256, 257, 258
+
+FRENCH_WORDS = ['manger', 'eau', 'maison', 'enfant', 'marcher', 'soleil', 'main', 'chien', 'grand', 'dormir']
+SARA_SYLLABLES = ['mbô', 'rû', 'màs¸', 'ndà', 'kò', 'tì', 'ngà', 'bɨ', 'lè', 'yà']
+
+def generate_texts(num_examples, seed=0):
+    """Exemples synthétiques au format d'entraînement"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(num_examples):
+        entry = {
+            'french': ' '.join(rng.choices(FRENCH_WORDS, k=rng.randint(1, 2))),
+            'sara_variants': [''.join(rng.choices(SARA_SYLLABLES, k=rng.randint(1, 3)))],
+        }
+        texts.append(format_training_text(entry))
+    return texts
+
+def encode(text):
+    """Tokenisation par octets UTF-8 (pas de tokenizer à télécharger)"""
+    return [BOS_ID] + list(text.encode('utf-8'))
+
+def tiny_model():
+    """Petit modèle Llama aléatoire (~1M paramètres), mêmes modules que Mistral pour LoRA"""
+    config = LlamaConfig(
+        vocab_size=PAD_ID + 1,
+        hidden_size=128,
+        intermediate_size=256,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        num_key_value_heads=4,
+        max_position_embeddings=MAX_LENGTH,
+        bos_token_id=BOS_ID,
+        eos_token_id=EOS_ID,
+        pad_token_id=PAD_ID,
+    )
+    model = LlamaForCausalLM(config)
+    lora_config = LoraConfig(
+        r=8,
+        lora_alpha=16,
+        target_modules=["q_proj", "v_proj", "k_proj", "o_proj"],
+        lora_dropout=0.05,
+        bias="none",
+        task_type="CAUSAL_LM"
+    )
+    return get_peft_model(model, lora_config)
+
+def main():
+    """Fonction principale"""
+    num_examples = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUM_EXAMPLES
+    
+    print("="*60)
+    print(f"Benchmark entrainement CPU ({num_examples} exemples)")
+    print("="*60)
+    
+    texts = generate_texts(num_examples)
+    dataset = Dataset.from_dict(pack_sequences([encode(t) for t in texts], MAX_LENGTH, EOS_ID, PAD_ID))
+    split = dataset.train_test_split(test_size=0.1, seed=0)
+    
+    training_config = {
+        'num_train_epochs': 1,
+        'per_device_train_batch_size': 8,
+        'gradient_accumulation_steps': 1,
+        'warmup_steps': 0,
+        'logging_steps': 1000,
+        'save_steps': 100000,
+        'eval_steps': 100000,
+        'precision': 'auto',
+    }
+    precision = resolve_precision(training_config, 'cpu')
+    print(f"   {torch.get_num_threads()} threads, precision {precision}")
+    print(f"   {len(split['train'])} sequences de {MAX_LENGTH} tokens")
+    
+    with tempfile.TemporaryDirectory() as output_dir:
+        for checkpointing in (False, True):
+            training_config['gradient_checkpointing'] = checkpointing
+            model = tiny_model()
+            if checkpointing:
+                model.enable_input_require_grads()
+            token_stats = TokenStats()
+            trainer = StatsTrainer(
+                model=model,
+                args=build_training_arguments(training_config, output_dir, 'cpu', precision, packing=True),
+                train_dataset=split['train'],
+                eval_dataset=split['test'],
+                data_collator=default_data_collator,
+                token_stats=token_stats,
+                packing=True,
+            )
+            start = time.perf_counter()
+            trainer.train()
+            elapsed = time.perf_counter() - start
+            train_examples = num_examples * len(split['train']) / len(dataset)
+            label = "avec" if checkpointing else "sans"
+            print(f"   {label} gradient checkpointing : {train_examples / elapsed:.1f} exemples/s, "
+                  f"{token_stats.real_tokens / elapsed:.0f} tokens/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark de la recherche approximative (index de trigrammes) vs difflib
+Génère un lexique synthétique (100k entrées par défaut) et des requêtes avec fautes
+Usage: python scripts/benchmarks/bench_fuzzy_search.py [nombre_d_entrees]
+"""
+
+import difflib
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts" / "data_processing"))
+
+from fuzzy_index import TrigramIndex, normalize_for_search
+
+DEFAULT_NUM_ENTRIES = 100_000
+NUM_QUERIES = 500
+NUM_DIFFLIB_QUERIES = 5
+
+# Syllabes consonne + voyelle (avec accents) pour des mots d'allure française
+FRENCH_SYLLABLES = [
+    consonant + vowel
+    for consonant in ['b', 'c', 'd', 'f', 'g', 'j', 'l', 'm', 'n', 'p', 'r', 's', 't', 'v', 'ch', 'qu']
+    for vowel in ['a', 'e', 'i', 'o', 'u', 'é', 'è', 'ê', 'ô', 'ou', 'an', 'on', 'in']
+]
+SARA_SYLLABLES = ['mbô', 'rû', 'màs¸', 'ndà', 'kò', 'tì', 'ngà', 'bɨ', 'lè', 'ɗò', 'yà']
+
+def generate_entries(num_entries, seed=0):
+    """Génère des entrées {'french', 'sara_variants'} synthétiques"""
+    rng = random.Random(seed)
+    entries = []
+    for _ in range(num_entries):
+        words = [''.join(rng.choices(FRENCH_SYLLABLES, k=rng.randint(1, 4))) for _ in range(rng.randint(1, 3))]
+        variants = [''.join(rng.choices(SARA_SYLLABLES, k=rng.randint(1, 3))) for _ in range(rng.randint(1, 3))]
+        entries.append({'french': ' '.join(words), 'sara_variants': variants})
+    return entries
+
+def misspell(text, rng):
+    """Retire les accents et introduit une faute de frappe"""
+    text = normalize_for_search(text)
+    if len(text) > 3:
+        pos = rng.randrange(len(text))
+        text = text[:pos] + rng.choice('aeioustr') + text[pos + 1:]
+    return text
+
+def main():
+    """Fonction principale"""
+    num_entries = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUM_ENTRIES
+    rng = random.Random(1)
+    
+    print("="*60)
+    print(f"Benchmark recherche approximative ({num_entries} entrees)")
+    print("="*60)
+    
+    entries = generate_entries(num_entries)
+    
+    start = time.perf_counter()
+    index = TrigramIndex.from_entries(entries)
+    print(f"   Construction de l'index : {time.perf_counter() - start:.2f}s ({len(index)} formes)")
+    
+    targets = [rng.randrange(num_entries) for _ in range(NUM_QUERIES)]
+    queries = [misspell(entries[i]['french'], rng) for i in targets]
+    
+    timings = []
+    found = 0
+    for target, query in zip(targets, queries):
+        start = time.perf_counter()
+        results = index.search(query, k=10)
+        timings.append((time.perf_counter() - start) * 1000)
+        if any(entries[french_id]['french'] == entries[target]['french'] for _, french_id, _, _ in results):
+            found += 1
+    
+    timings.sort()
+    print(f"   Trigrammes : mediane {statistics.median(timings):.2f} ms, "
+          f"p95 {timings[int(len(timings) * 0.95)]:.2f} ms, max {timings[-1]:.2f} ms")
+    print(f"   Mot cherche dans le top 10 : {found}/{NUM_QUERIES}")
+    
+    # Référence : balayage linéaire difflib (sur quelques requêtes seulement, c'est lent)
+    keys = [normalize_for_search(e['french']) for e in entries]
+    start = time.perf_counter()
+    for query in queries[:NUM_DIFFLIB_QUERIES]:
+        difflib.get_close_matches(query, keys, n=10)
+    difflib_ms = (time.perf_counter() - start) * 1000 / NUM_DIFFLIB_QUERIES
+    print(f"   difflib (balayage lineaire) : {difflib_ms:.1f} ms par requete")
+
+if __name__ == "__main__":
+    main()
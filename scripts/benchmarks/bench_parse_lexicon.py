@@ -0,0 +1,194 @@
+"""
+Benchmark du parsing du lexique : ancienne version vs tokenizer compilé
+Génère un lexique synthétique (1M lignes par défaut) et mesure les lignes/seconde
+Usage: python scripts/benchmarks/bench_parse_lexicon.py [nombre_de_lignes]
+"""
+
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts" / "data_processing"))
+
+from prepare_training_data import SARA_CODES, parse_lexicon_entries
+
+DEFAULT_NUM_LINES = 1_000_000
+
+FRENCH_WORDS = ['à côté de', 'acide', 'être', 'maison', 'eau', 'manger', 'grand', 'petit',
+                'arbre', 'chemin', 'marché', 'famille', 'enfant', 'soleil', 'poisson']
+SARA_SYLLABLES = ['mbô', 'rû', 'màs¸', 'ndà', 'kò', 'tì', 'ngà', 'bɨ', 'lè', 'ɗò', 'yà']
+
+def parse_lexicon_entries_legacy(text):
+    """
+    Ancienne version de parse_lexicon_entries (re.sub par code et par ligne)
+    Conservée uniquement comme référence pour le benchmark
+    """
+    entries = []
+    lines = text.split('\n')
+    
+    # Codes de langues Sara (abréviations)
+    sara_codes = ['Beb', 'Bd', 'Gor', 'Gu', 'Kbb', 'Db', 'Mb', 'Mo', 'Nar', 'KbN', 'NgT', 'Ngb', 'Sr', 'Lk', 'Kul']
+    
+    current_french = None
+    accumulated_sara = []
+    
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        
+        if not line or len(line) < 2:
+            i += 1
+            continue
+        
+        # Ignorer les lignes d'en-tête
+        if 'Lexique' in line or 'Introduction' in line or line.startswith('Page') or (line.isdigit() and len(line) < 4):
+            i += 1
+            continue
+        
+        # Pattern 1: Ligne avec codes de langues (ex: Beb=mbô : Bd=rû)
+        sara_matches = re.findall(r'([A-Z][a-z]?[A-Z]?)=([^:,\n]+)', line)
+        
+        if sara_matches:
+            # Extraire les mots Sara de cette ligne
+            sara_words = []
+            for code, word in sara_matches:
+                word = word.strip().rstrip(',').strip()
+                # Nettoyer les caractères parasites
+                word = re.sub(r'^[,:;\s]+|[,:;\s]+$', '', word)
+                if word and len(word) > 0 and code in sara_codes:
+                    sara_words.append(word)
+            
+            if sara_words:
+                accumulated_sara.extend(sara_words)
+            
+            # Chercher du français dans cette ligne (après les codes)
+            # Enlever tous les codes de langues
+            remaining = line
+            for code in sara_codes:
+                remaining = re.sub(rf'{code}=[^:,\s]+', '', remaining)
+            # Enlever les séparateurs
+            remaining = re.sub(r'[:,\s]+', ' ', remaining).strip()
+            # Enlever les caractères parasites
+            remaining = re.sub(r'^[,:;\s]+|[,:;\s]+$', '', remaining)
+            
+            # Si ce qui reste ressemble à du français (longueur raisonnable, pas de =)
+            if remaining and len(remaining) > 2 and len(remaining) < 200 and '=' not in remaining:
+                # C'est probablement du français
+                if accumulated_sara:
+                    entries.append({
+                        'french': remaining,
+                        'sara_variants': list(set(accumulated_sara))
+                    })
+                    accumulated_sara = []
+                current_french = None
+                i += 1
+                continue
+            
+            # Si pas de français dans cette ligne, vérifier la suivante
+            if i + 1 < len(lines):
+                next_line = lines[i + 1].strip()
+                # Si la ligne suivante n'a pas de codes de langues, c'est probablement un nouveau mot français
+                if next_line and len(next_line) > 2 and not re.search(r'[A-Z][a-z]?[A-Z]?=', next_line):
+                    # Sauvegarder l'entrée actuelle si on a des données
+                    if accumulated_sara and current_french:
+                        entries.append({
+                            'french': current_french,
+                            'sara_variants': list(set(accumulated_sara))
+                        })
+                        accumulated_sara = []
+                    # Le français suivant devient le nouveau
+                    french_clean = next_line.strip().rstrip(':').strip()
+                    french_clean = re.sub(r'^\d+\s+', '', french_clean)
+                    if len(french_clean) > 2 and len(french_clean) < 200:
+                        current_french = french_clean
+                    i += 1  # Passer la ligne suivante aussi
+                    continue
+        
+        # Pattern 2: Ligne avec juste du français (sans codes de langues)
+        elif not re.search(r'[A-Z][a-z]?[A-Z]?=', line):
+            # C'est probablement une ligne de français
+            french = line.strip().rstrip(':').strip()
+            # Nettoyer (enlever les numéros de page, etc.)
+            french = re.sub(r'^\d+\s+', '', french)
+            # Enlever caractères parasites
+            french = re.sub(r'^[,:;\s]+|[,:;\s]+$', '', french)
+            
+            if len(french) > 2 and len(french) < 200:
+                # Si on avait des traductions Sara accumulées, les sauvegarder
+                if accumulated_sara and current_french:
+                    entries.append({
+                        'french': current_french,
+                        'sara_variants': list(set(accumulated_sara))
+                    })
+                    accumulated_sara = []
+                
+                current_french = french
+        
+        i += 1
+    
+    # Sauvegarder la dernière entrée si nécessaire
+    if accumulated_sara and current_french:
+        entries.append({
+            'french': current_french,
+            'sara_variants': list(set(accumulated_sara))
+        })
+    
+    return entries
+
+
+def generate_lexicon(num_lines, seed=0):
+    """Génère un texte de lexique synthétique au format Morkeg"""
+    rng = random.Random(seed)
+    lines = []
+    while len(lines) < num_lines:
+        lines.append(rng.choice(FRENCH_WORDS) + (' :' if rng.random() < 0.3 else ''))
+        for _ in range(rng.randint(1, 3)):
+            pairs = [
+                f"{rng.choice(SARA_CODES)}={''.join(rng.choices(SARA_SYLLABLES, k=rng.randint(1, 3)))}"
+                for _ in range(rng.randint(1, 4))
+            ]
+            line = ' : '.join(pairs)
+            # Parfois le français est sur la même ligne que les codes
+            if rng.random() < 0.2:
+                line += ' ' + rng.choice(FRENCH_WORDS)
+            lines.append(line)
+        if rng.random() < 0.01:
+            lines.append(str(rng.randint(1, 999)))
+    return '\n'.join(lines[:num_lines])
+
+def time_parser(parser, text, num_lines):
+    """Mesure un parser et renvoie (entrées, lignes/seconde)"""
+    start = time.perf_counter()
+    entries = parser(text)
+    elapsed = time.perf_counter() - start
+    return entries, num_lines / elapsed
+
+def main():
+    """Fonction principale"""
+    num_lines = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUM_LINES
+    
+    print("="*60)
+    print(f"Benchmark parse_lexicon_entries ({num_lines} lignes)")
+    print("="*60)
+    
+    text = generate_lexicon(num_lines)
+    
+    legacy_entries, legacy_rate = time_parser(parse_lexicon_entries_legacy, text, num_lines)
+    print(f"   Avant (re.sub par code) : {legacy_rate:,.0f} lignes/s")
+    
+    entries, rate = time_parser(parse_lexicon_entries, text, num_lines)
+    print(f"   Apres (tokenizer compile) : {rate:,.0f} lignes/s")
+    print(f"   Acceleration : x{rate / legacy_rate:.2f}")
+    
+    # Comparer les résultats (l'ordre des variantes vient d'un set)
+    normalize = lambda items: [(e['french'], sorted(e['sara_variants'])) for e in items]
+    if normalize(entries) == normalize(legacy_entries):
+        print(f"OK - Resultats identiques ({len(entries)} entrees)")
+    else:
+        print("ERREUR - Les resultats different entre les deux versions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark de la conversion phonétique : ancienne version (str.replace par règle)
+vs transducteur compilé (mot par mot et par lot)
+Usage: python scripts/benchmarks/bench_phonetics.py [nombre_de_mots]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts" / "data_processing"))
+
+from add_phonetics import create_phonetic_mapping, PhoneticTransducer
+
+DEFAULT_NUM_WORDS = 200_000
+
+SARA_SYLLABLES = ['mbô', 'rû', 'màs¸', 'ndà', 'kò', 'tì', 'ngà', 'bɨ', 'lè', "d'ò", 'yà',
+                  'njè', 'ja', 'čo', 'wu', 'hã', 'sẽ', 'pĩ', 'gõ', 'tũ']
+
+def text_to_phonetic_legacy(text, phonetic_map):
+    """Ancienne version : un str.replace par règle, mapping retrié à chaque mot"""
+    text = text.lower().strip()
+    phonetic = text
+    for char, ipa in sorted(phonetic_map.items(), key=lambda x: -len(x[0])):
+        phonetic = phonetic.replace(char, ipa)
+    return phonetic
+
+def generate_words(num_words, seed=0):
+    """Génère des mots Sara synthétiques"""
+    rng = random.Random(seed)
+    return [''.join(rng.choices(SARA_SYLLABLES, k=rng.randint(1, 4))) for _ in range(num_words)]
+
+def rate(func, num_words):
+    """Mesure func() et renvoie (résultat, mots/seconde)"""
+    start = time.perf_counter()
+    result = func()
+    return result, num_words / (time.perf_counter() - start)
+
+def main():
+    """Fonction principale"""
+    num_words = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUM_WORDS
+    
+    print("="*60)
+    print(f"Benchmark conversion phonetique ({num_words} mots)")
+    print("="*60)
+    
+    words = generate_words(num_words)
+    phonetic_map = create_phonetic_mapping()
+    transducer = PhoneticTransducer(phonetic_map)
+    
+    legacy, legacy_rate = rate(lambda: [text_to_phonetic_legacy(w, phonetic_map) for w in words], num_words)
+    print(f"   Avant (str.replace par regle) : {legacy_rate:,.0f} mots/s")
+    
+    single, single_rate = rate(lambda: [transducer.convert(w) for w in words], num_words)
+    print(f"   Transducteur, mot par mot : {single_rate:,.0f} mots/s (x{single_rate / legacy_rate:.1f})")
+    
+    batch, batch_rate = rate(lambda: transducer.convert_batch(words), num_words)
+    print(f"   Transducteur, par lot : {batch_rate:,.0f} mots/s (x{batch_rate / legacy_rate:.1f})")
+    
+    if single != batch:
+        print("ERREUR - Les conversions mot par mot et par lot different")
+    
+    # Les différences avec l'ancienne version viennent des règles réappliquées
+    # à leur propre sortie (ex: "y" -> "j" -> "dʒ")
+    changed = sum(1 for old, new in zip(legacy, single) if old != new)
+    print(f"   Mots corriges par rapport a l'ancienne version : {changed}")
+    for word, old, new in [(w, o, n) for w, o, n in zip(words, legacy, single) if o != n][:3]:
+        print(f"      {word} : {old} -> {new}")
+
+if __name__ == "__main__":
+    main()
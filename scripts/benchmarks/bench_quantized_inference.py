@@ -0,0 +1,75 @@
+"""
+Benchmark du modèle quantifié int8 vs le modèle fusionné fp32, sur CPU
+Mesure la latence par batch, la taille des poids et l'exactitude (réponse égale à
+une des sara_variants, sans tenir compte des tons/accents) sur les entrées réservées
+à l'évaluation
+Usage: python scripts/benchmarks/bench_quantized_inference.py [nombre_d_entrees]
+"""
+
+import gc
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts" / "inference"))
+sys.path.insert(0, str(BASE_DIR / "scripts" / "training"))
+
+from inference_engine import InferenceEngine, load_config, get_model_dir
+from export_quantized import get_quantized_dir, model_size_mb, process_rss_mb
+from evaluate_lexicon import held_out_entries, is_exact_match
+
+DEFAULT_NUM_ENTRIES = 200
+BATCH_SIZE = 16
+
+def evaluate(engine, entries):
+    """Renvoie (latences par batch en ms, nombre de réponses exactes)"""
+    timings = []
+    correct = 0
+    for i in range(0, len(entries), BATCH_SIZE):
+        batch = entries[i:i + BATCH_SIZE]
+        start = time.perf_counter()
+        answers = engine.translate_batch([entry['french'] for entry in batch])
+        timings.append((time.perf_counter() - start) * 1000)
+        correct += sum(is_exact_match(a, e['sara_variants']) for a, e in zip(answers, batch))
+    return timings, correct
+
+def main():
+    """Fonction principale"""
+    num_entries = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUM_ENTRIES
+    config = load_config()
+    
+    print("="*60)
+    print("Benchmark inference CPU : fp32 fusionne vs int8")
+    print("="*60)
+    
+    model_dir = get_model_dir(config)
+    quantized_dir = get_quantized_dir(config)
+    if not quantized_dir.exists():
+        print(f"ERREUR - Modele quantifie introuvable : {quantized_dir}")
+        print("Execute d'abord : python scripts/inference/export_quantized.py")
+        return
+    
+    with open(BASE_DIR / "data" / "training" / "training_data_cleaned.json", 'r', encoding='utf-8') as f:
+        entries = held_out_entries(json.load(f), num_entries)
+    print(f"   {len(entries)} entrees d'evaluation, batchs de {BATCH_SIZE}")
+    
+    for label, path in (("fp32", model_dir), ("int8", quantized_dir)):
+        gc.collect()
+        rss_before = process_rss_mb()
+        start = time.perf_counter()
+        engine = InferenceEngine(path, device='cpu', precision='fp32', merge=True)
+        load_s = time.perf_counter() - start
+        timings, correct = evaluate(engine, entries)
+        print(f"\n   {label} : chargement {load_s:.1f}s, poids {model_size_mb(engine.model):.0f} Mo")
+        rss = process_rss_mb()
+        if rss is not None:
+            print(f"      memoire residente : {rss:.0f} Mo (+{rss - rss_before:.0f} Mo pour ce modele)")
+        print(f"      latence par batch : mediane {statistics.median(timings):.0f} ms, max {max(timings):.0f} ms")
+        print(f"      exactitude : {correct}/{len(entries)} ({correct / max(len(entries), 1):.1%})")
+        del engine
+
+if __name__ == "__main__":
+    main()
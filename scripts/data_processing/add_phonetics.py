@@ -2,13 +2,28 @@
 Script pour ajouter des transcriptions phonétiques (IPA) aux données
 """
 
+import hashlib
 import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import re
 import yaml
 
 BASE_DIR = Path(__file__).parent.parent.parent
 DATA_DIR = BASE_DIR / "data"
+TRAINING_DIR = DATA_DIR / "training"
 CONFIG_FILE = BASE_DIR / "config.yaml"
+# Fichier annexe {forme Sara: IPA} pour le lexique nettoyé
+PHONETICS_FILE = TRAINING_DIR / "phonetics.json"
+
+# Nombre de processus pour l'annotation (1 = mode séquentiel)
+NUM_WORKERS = os.cpu_count() or 1
+# Formes par lot envoyé à un processus
+FORMS_PER_CHUNK = 5000
+
+# Transducteur du processus (compilé une fois par l'initialiseur)
+_transducer = None
 
 def load_config():
     """Charge la configuration"""
@@ -62,20 +77,137 @@ def create_phonetic_mapping():
     
     return phonetic_map
 
+class PhoneticTransducer:
+    """
+    Mapping phonétique compilé une seule fois en transducteur à plus longue correspondance
+    Une seule passe de gauche à droite : la sortie d'une règle n'est jamais
+    réinterprétée par une autre (ex: "y" -> "j" ne devient pas "dʒ")
+    """
+    
+    def __init__(self, phonetic_map):
+        # Les correspondances identiques (b -> b) n'ont pas besoin d'être réécrites
+        self.table = {src: ipa for src, ipa in phonetic_map.items() if src != ipa}
+        # Alternative la plus longue d'abord : "ng" avant "n", "d'" avant "d"
+        keys = sorted(self.table, key=lambda k: (-len(k), k))
+        self.pattern = re.compile('|'.join(map(re.escape, keys))) if keys else None
+    
+    def _replace(self, match):
+        return self.table[match.group(0)]
+    
+    def convert(self, text):
+        """Convertit un texte Sara en transcription phonétique approximative"""
+        # Normaliser le texte
+        text = text.lower().strip()
+        if self.pattern is None:
+            return text
+        return self.pattern.sub(self._replace, text)
+    
+    def convert_batch(self, texts):
+        """
+        Convertit une liste de textes en une seule passe regex sur le texte concaténé
+        (évite le coût d'un appel par mot sur un vocabulaire entier)
+        """
+        texts = [text.lower().strip() for text in texts]
+        if self.pattern is None or not texts:
+            return texts
+        if any('\n' in text for text in texts):
+            return [self.pattern.sub(self._replace, text) for text in texts]
+        return self.pattern.sub(self._replace, '\n'.join(texts)).split('\n')
+
+_transducer_cache = {}
+
+def compile_phonetic_map(phonetic_map):
+    """Compile (une seule fois par contenu de mapping) le transducteur phonétique"""
+    key = frozenset(phonetic_map.items())
+    transducer = _transducer_cache.get(key)
+    if transducer is None:
+        transducer = _transducer_cache[key] = PhoneticTransducer(phonetic_map)
+    return transducer
+
 def text_to_phonetic(text, phonetic_map):
     """
     Convertit un texte Sara en transcription phonétique approximative
     Note: C'est une approximation basique, idéalement fait par un linguiste
+    
+    Args:
+        text: Texte Sara
+        phonetic_map: Dictionnaire de create_phonetic_mapping() ou PhoneticTransducer
     """
-    # Normaliser le texte
-    text = text.lower().strip()
+    if not isinstance(phonetic_map, PhoneticTransducer):
+        phonetic_map = compile_phonetic_map(phonetic_map)
+    return phonetic_map.convert(text)
+
+def phonetic_map_hash(phonetic_map):
+    """Empreinte du mapping : un mapping modifié invalide le fichier annexe"""
+    return hashlib.sha256(
+        json.dumps(sorted(phonetic_map.items()), ensure_ascii=False).encode('utf-8')
+    ).hexdigest()[:16]
+
+def _init_worker():
+    """Compile le mapping par défaut une seule fois dans le processus"""
+    global _transducer
+    _transducer = PhoneticTransducer(create_phonetic_mapping())
+
+def _convert_chunk(forms):
+    """Convertit un lot de formes déjà dédupliquées (exécuté dans un processus)"""
+    return _transducer.convert_batch(forms)
+
+def load_phonetics_sidecar(map_hash):
+    """Charge les transcriptions déjà calculées (vide si le mapping a changé)"""
+    if not PHONETICS_FILE.exists():
+        return {}
+    with open(PHONETICS_FILE, 'r', encoding='utf-8') as f:
+        sidecar = json.load(f)
+    if sidecar.get('map_hash') != map_hash:
+        print("   Mapping phonetique modifie : recalcul complet")
+        return {}
+    return sidecar.get('phonetics', {})
+
+def annotate_lexicon(workers=NUM_WORKERS):
+    """
+    Transcrit toutes les formes sara_variants de training_data_cleaned.json
+    Les formes sont dédupliquées, seules les nouvelles formes sont calculées,
+    par lots répartis sur un pool de processus
+    
+    Returns:
+        Dictionnaire {forme Sara: IPA}, ou None si le lexique est introuvable
+    """
+    data_file = TRAINING_DIR / "training_data_cleaned.json"
+    if not data_file.exists():
+        print(f"ERREUR - Fichier introuvable : {data_file}")
+        print("Execute d'abord : python scripts/data_processing/clean_and_normalize.py")
+        return None
+    
+    with open(data_file, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    
+    # Formes uniques, dans l'ordre d'apparition
+    forms = list(dict.fromkeys(
+        variant for entry in entries for variant in entry.get('sara_variants', []) if variant
+    ))
     
-    # Remplacer selon le mapping
-    phonetic = text
-    for char, ipa in sorted(phonetic_map.items(), key=lambda x: -len(x[0])):
-        phonetic = phonetic.replace(char, ipa)
+    map_hash = phonetic_map_hash(create_phonetic_mapping())
+    phonetics = load_phonetics_sidecar(map_hash)
+    missing = [form for form in forms if form not in phonetics]
+    print(f"   {len(forms)} formes uniques, {len(forms) - len(missing)} deja transcrites, {len(missing)} a calculer")
     
-    return phonetic
+    chunks = [missing[i:i + FORMS_PER_CHUNK] for i in range(0, len(missing), FORMS_PER_CHUNK)]
+    workers = max(1, min(workers, len(chunks)))
+    if workers == 1:
+        _init_worker()
+        results = map(_convert_chunk, chunks)
+        for chunk, converted in zip(chunks, results):
+            phonetics.update(zip(chunk, converted))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            for chunk, converted in zip(chunks, executor.map(_convert_chunk, chunks)):
+                phonetics.update(zip(chunk, converted))
+    
+    with open(PHONETICS_FILE, 'w', encoding='utf-8') as f:
+        json.dump({'map_hash': map_hash, 'phonetics': phonetics}, f, ensure_ascii=False, indent=2)
+    
+    print(f"   Transcriptions sauvegardees : {PHONETICS_FILE}")
+    return phonetics
 
 def process_vocabulary():
     """Traite le vocabulaire et ajoute la phonétique"""
@@ -90,12 +222,12 @@ def process_vocabulary():
     with open(vocab_file, 'r', encoding='utf-8') as f:
         vocabulary = json.load(f)
     
-    phonetic_map = create_phonetic_mapping()
+    transducer = PhoneticTransducer(create_phonetic_mapping())
     
-    # Ajouter la phonétique à chaque entrée
-    for entry in vocabulary:
-        if 'sara' in entry:
-            entry['phonetic'] = text_to_phonetic(entry['sara'], phonetic_map)
+    # Ajouter la phonétique à chaque entrée (conversion groupée)
+    with_sara = [entry for entry in vocabulary if 'sara' in entry]
+    for entry, phonetic in zip(with_sara, transducer.convert_batch([e['sara'] for e in with_sara])):
+        entry['phonetic'] = phonetic
     
     # Sauvegarder
     output_file = DATA_DIR / "processed" / "vocabulary_with_phonetics.json"
@@ -114,7 +246,12 @@ def main():
     print("Pour une meilleure precision, consulte un linguiste")
     print("ou utilise des outils specialises comme Praat.\n")
     
-    process_vocabulary()
+    print("Transcription du lexique nettoye...")
+    annotate_lexicon()
+    
+    # Ancien format de vocabulaire (si présent)
+    if (DATA_DIR / "processed" / "vocabulary.json").exists():
+        process_vocabulary()
     
     print("\n" + "="*50)
     print("Ressources pour la phonetique:")
@@ -0,0 +1,228 @@
+"""
+Autocomplétion des mots français et des formes Sara (saisie au fil des lettres)
+Trie compact sur les formes repliées (sans accents ni tons), avec les N meilleures
+complétions précalculées à chaque nœud : une requête = descente du préfixe
+Le trie est sérialisé dans des tableaux plats et rechargé sans reconstruction
+"""
+
+import json
+import os
+import struct
+import unicodedata
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+
+from fuzzy_index import normalize_for_search, FIELD_FRENCH, FIELD_SARA
+from lexicon_store import LexiconStore, STORE_FILE, PROCESSED_DIR
+
+AUTOCOMPLETE_FILE = PROCESSED_DIR / "autocomplete.bin"
+AUTOCOMPLETE_MAGIC = b'TLAC'
+# Complétions gardées par nœud et par champ (français, Sara)
+TOP_N = 10
+
+def store_signature(path=STORE_FILE):
+    """Taille et date de modification du lexique : un trie construit sur un autre lexique est périmé"""
+    stat = Path(path).stat()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def _fold(text):
+    """Clé du trie : "Màs¸" -> "mas" (la saisie sans tons retrouve les formes tonales)"""
+    return normalize_for_search(text)
+
+def _exact(text):
+    """Forme exacte comparable (NFC, minuscules) pour départager une saisie avec tons"""
+    return unicodedata.normalize('NFC', text).casefold()
+
+class Autocomplete:
+    """
+    Trie aplati :
+    - edge_start[n]..edge_start[n+1] : arêtes du nœud n, triées par caractère
+    - edge_char / edge_child : code du caractère et nœud fils
+    - top_start[n]..top_start[n+1] : meilleures complétions (index de terme) du nœud n,
+      les N meilleures de chaque champ, par rang croissant : filtrer par champ avant
+      de couper à la limite reste exact
+    source : signature du lexique d'origine (store_signature), None si inconnue
+    """
+    
+    def __init__(self, terms, fields, freqs, edge_start, edge_char, edge_child, top_start, top_ids,
+                 source=None):
+        self.source = source
+        self.terms = terms
+        self.fields = fields
+        self.freqs = freqs
+        self._edge_start = edge_start
+        self._edge_char = edge_char
+        self._edge_child = edge_child
+        self._top_start = top_start
+        self._top_ids = top_ids
+    
+    @property
+    def node_count(self):
+        return len(self._edge_start) - 1
+    
+    @classmethod
+    def build(cls, counts, top_n=TOP_N):
+        """
+        Construit le trie
+        
+        Args:
+            counts: Dictionnaire {(forme, champ): fréquence}
+            top_n: Complétions gardées par nœud et par champ
+        """
+        items = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        terms = [form for (form, _), _ in items]
+        fields = array('B', [field for (_, field), _ in items])
+        freqs = array('I', [freq for _, freq in items])
+        
+        # Trie en dictionnaires ; les termes sont déjà triés par fréquence décroissante,
+        # donc les N premiers termes d'un champ vus sous un nœud sont ses N meilleures
+        # complétions pour ce champ (et les N meilleures tous champs confondus en font partie)
+        root = {}
+        tops = {id(root): ([], {})}
+        for term_id, term in enumerate(terms):
+            field = fields[term_id]
+            node = root
+            path = [root]
+            for char in _fold(term):
+                child = node.get(char)
+                if child is None:
+                    child = node[char] = {}
+                    tops[id(child)] = ([], {})
+                node = child
+                path.append(node)
+            for visited in path:
+                top, per_field = tops[id(visited)]
+                if per_field.get(field, 0) < top_n:
+                    top.append(term_id)
+                    per_field[field] = per_field.get(field, 0) + 1
+        
+        # Aplatir en largeur d'abord
+        edge_start = array('I', [0])
+        edge_char = array('I')
+        edge_child = array('I')
+        top_start = array('I', [0])
+        top_ids = array('I')
+        queue = [root]
+        for node in queue:
+            for char in sorted(node):
+                edge_char.append(ord(char))
+                edge_child.append(len(queue))
+                queue.append(node[char])
+            edge_start.append(len(edge_char))
+            top_ids.extend(tops[id(node)][0])
+            top_start.append(len(top_ids))
+        
+        return cls(terms, fields, freqs, edge_start, edge_char, edge_child, top_start, top_ids)
+    
+    @classmethod
+    def from_store(cls, store, top_n=TOP_N):
+        """
+        Fréquence = nombre de triplets du lexique où apparaît la forme
+        Le trie garde la signature du fichier du lexique (voir is_stale)
+        """
+        counts = {}
+        for french_id in range(len(store)):
+            forms = store.forms_at(french_id)
+            french = store.french(french_id)
+            counts[(french, FIELD_FRENCH)] = counts.get((french, FIELD_FRENCH), 0) + len(forms)
+            for _, form in forms:
+                counts[(form, FIELD_SARA)] = counts.get((form, FIELD_SARA), 0) + 1
+        autocomplete = cls.build(counts, top_n)
+        autocomplete.source = store_signature(store.path)
+        return autocomplete
+    
+    def is_stale(self, store_path=STORE_FILE):
+        """Vrai si le lexique a été reconstruit depuis la construction du trie"""
+        return self.source != store_signature(store_path)
+    
+    def _find_node(self, folded):
+        node = 0
+        for char in folded:
+            start = self._edge_start[node]
+            end = self._edge_start[node + 1]
+            pos = bisect_left(self._edge_char, ord(char), start, end)
+            if pos == end or self._edge_char[pos] != ord(char):
+                return None
+            node = self._edge_child[pos]
+        return node
+    
+    def complete(self, prefix, limit=TOP_N, field=None):
+        """
+        Meilleures complétions d'un préfixe (par fréquence décroissante)
+        Si le préfixe contient des tons/accents, les formes qui les respectent passent devant
+        
+        Returns:
+            Liste de (forme, champ, fréquence)
+        """
+        node = self._find_node(_fold(prefix))
+        if node is None:
+            return []
+        term_ids = [
+            term_id
+            for term_id in self._top_ids[self._top_start[node]:self._top_start[node + 1]]
+            if field is None or self.fields[term_id] == field
+        ]
+        typed = _exact(prefix.strip())
+        if typed != _fold(prefix):
+            term_ids.sort(key=lambda term_id: not _exact(self.terms[term_id]).startswith(typed))
+        return [(self.terms[i], self.fields[i], self.freqs[i]) for i in term_ids[:limit]]
+    
+    def save(self, path=AUTOCOMPLETE_FILE):
+        """
+        Sérialise le trie (en-tête JSON + tableaux binaires)
+        Écrit dans un fichier temporaire puis le renomme : un lecteur ne voit jamais un fichier partiel
+        """
+        arrays = [self.fields, self.freqs, self._edge_start, self._edge_char,
+                  self._edge_child, self._top_start, self._top_ids]
+        header = json.dumps({
+            'source': self.source,
+            'terms': self.terms,
+            'arrays': [(a.typecode, len(a)) for a in arrays],
+        }, ensure_ascii=False).encode('utf-8')
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(AUTOCOMPLETE_MAGIC)
+            f.write(struct.pack('<I', len(header)))
+            f.write(header)
+            for a in arrays:
+                a.tofile(f)
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, path=AUTOCOMPLETE_FILE):
+        """Recharge un trie sérialisé (lecture directe des tableaux, sans reconstruction)"""
+        with open(path, 'rb') as f:
+            if f.read(4) != AUTOCOMPLETE_MAGIC:
+                raise ValueError(f"Fichier d'autocompletion invalide : {path}")
+            (header_len,) = struct.unpack('<I', f.read(4))
+            header = json.loads(f.read(header_len).decode('utf-8'))
+            arrays = []
+            for typecode, length in header['arrays']:
+                a = array(typecode)
+                a.fromfile(f, length)
+                arrays.append(a)
+        return cls(header['terms'], *arrays, source=header.get('source'))
+
+def main():
+    """Construit le trie d'autocomplétion depuis le lexique colonnaire"""
+    print("="*60)
+    print("Construction de l'autocompletion (trie)")
+    print("="*60)
+    
+    if not STORE_FILE.exists():
+        print(f"ERREUR - Fichier introuvable : {STORE_FILE}")
+        print("Execute d'abord : python scripts/data_processing/lexicon_store.py")
+        return
+    
+    with LexiconStore(STORE_FILE) as store:
+        autocomplete = Autocomplete.from_store(store)
+    autocomplete.save(AUTOCOMPLETE_FILE)
+    
+    print(f"   {len(autocomplete.terms)} formes, {autocomplete.node_count} noeuds")
+    print(f"\nOK - Autocompletion sauvegardee : {AUTOCOMPLETE_FILE}")
+
+if __name__ == "__main__":
+    main()
@@ -6,16 +6,29 @@ Option 1 : Nettoyage & normalisation avant l'entraînement
 import json
 from pathlib import Path
 import re
+from itertools import chain
 from tqdm import tqdm
 
+from prepare_training_data import iter_jsonl
+
 BASE_DIR = Path(__file__).parent.parent.parent
 DATA_DIR = BASE_DIR / "data"
 TRAINING_DIR = DATA_DIR / "training"
 PROCESSED_DIR = DATA_DIR / "processed"
 
 def load_training_data():
-    """Charge les données d'entraînement brutes"""
-    # Essayer d'abord le fichier des entrées brutes du lexique
+    """
+    Charge les données d'entraînement brutes
+    Renvoie un générateur si les entrées sont au format JSON Lines, sinon une liste
+    """
+    # Essayer d'abord les entrées brutes du lexique en JSON Lines (flux)
+    raw_entries_jsonl = TRAINING_DIR / "lexicon_entries_raw.jsonl"
+    
+    if raw_entries_jsonl.exists():
+        print(f"   Lecture en flux depuis : {raw_entries_jsonl}")
+        return iter_jsonl(raw_entries_jsonl)
+    
+    # Ancien format : tableau JSON complet
     raw_entries_file = TRAINING_DIR / "lexicon_entries_raw.json"
     
     if raw_entries_file.exists():
@@ -46,6 +59,7 @@ def load_training_data():
                     
                     # Extraire les mots Sara de l'output (peut contenir des codes comme "Lk=màs¸")
                     sara_words = []
+                    sara_forms = []
                     
                     # Chercher les codes de langues dans l'output
                     sara_matches = re.findall(r'([A-Z][a-z]?[A-Z]?)=([^:,\s]+)', output)
@@ -54,6 +68,8 @@ def load_training_data():
                         word = re.sub(r'^[,:;\s]+|[,:;\s]+$', '', word)
                         if word and code in sara_codes:
                             sara_words.append(word)
+                            if [code, word] not in sara_forms:
+                                sara_forms.append([code, word])
                     
                     # Si pas de codes trouvés, prendre tout l'output comme mot Sara (peut être juste un mot)
                     if not sara_words:
@@ -69,10 +85,13 @@ def load_training_data():
                     # Si on a trouvé des mots Sara
                     if sara_words and french not in seen:
                         seen.add(french)
-                        converted.append({
+                        converted_entry = {
                             'french': french,
                             'sara_variants': list(set(sara_words))  # Enlever doublons
-                        })
+                        }
+                        if sara_forms:
+                            converted_entry['sara_forms'] = sara_forms
+                        converted.append(converted_entry)
                 
                 print(f"   {len(converted)} entrees converties")
                 return converted
@@ -228,11 +247,22 @@ def normalize_entries(entries):
         if not normalized_sara:
             continue
         
+        # Conserver le dialecte de chaque forme (couples [code, forme])
+        normalized_forms = []
+        for pair in entry.get('sara_forms', []):
+            if not isinstance(pair, (list, tuple)) or len(pair) != 2:
+                continue
+            form = normalize_sara_word(pair[1])
+            if form and [pair[0], form] not in normalized_forms:
+                normalized_forms.append([pair[0], form])
+        
         # Créer l'entrée normalisée
         normalized_entry = {
             'french': french,
             'sara_variants': normalized_sara
         }
+        if normalized_forms:
+            normalized_entry['sara_forms'] = normalized_forms
         
         # Vérifier la validité
         if not validate_entry(normalized_entry):
@@ -275,10 +305,22 @@ def main():
     print("\n[1/4] Chargement des donnees brutes...")
     entries = load_training_data()
     
-    if not entries:
+    if entries is None:
         return
     
-    print(f"   {len(entries)} entrees chargees")
+    if isinstance(entries, list):
+        if not entries:
+            print("ERREUR - Aucune entree a nettoyer")
+            return
+        print(f"   {len(entries)} entrees chargees")
+    else:
+        # Flux JSON Lines : lire la première entrée pour ne pas écraser
+        # training_data_cleaned.json avec une liste vide
+        first = next(entries, None)
+        if first is None:
+            print("ERREUR - Aucune entree a nettoyer")
+            return
+        entries = chain([first], entries)
     
     # Normaliser
     print("\n[2/4] Normalisation des entrees...")
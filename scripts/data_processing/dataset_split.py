@@ -0,0 +1,42 @@
+"""
+Découpage entraînement / évaluation stable, par mot français
+Le choix dépend uniquement du hachage de la clé normalisée du mot (french_key) :
+toutes les entrées et tous les exemples d'un même mot restent du même côté,
+quel que soit l'ordre des données ou la machine, sans rien recalculer ni stocker
+Utilisé par l'entraînement, l'évaluation et le cache du dataset tokenisé
+"""
+
+import hashlib
+
+from lexicon_store import french_key
+
+SPLIT_TRAIN = 'train'
+SPLIT_EVAL = 'eval'
+
+# Part des mots réservés à l'évaluation, en millièmes
+EVAL_PER_MILLE = 100
+# Modifier le sel (ou EVAL_PER_MILLE) change le découpage : il fait partie de SPLIT_VERSION
+SPLIT_SALT = b'tchad-langues-split-v1'
+SPLIT_VERSION = f"{SPLIT_SALT.decode('ascii')}-{EVAL_PER_MILLE}"
+
+def split_bucket(french):
+    """Seau 0-999 d'un mot français (hachage stable entre processus et machines)"""
+    digest = hashlib.blake2b(french_key(french).encode('utf-8'), digest_size=8, key=SPLIT_SALT).digest()
+    return int.from_bytes(digest, 'little') % 1000
+
+def split_of(french):
+    """SPLIT_TRAIN ou SPLIT_EVAL pour un mot français"""
+    return SPLIT_EVAL if split_bucket(french) < EVAL_PER_MILLE else SPLIT_TRAIN
+
+def split_entries(entries):
+    """
+    Sépare les entrées {'french', ...} en (entraînement, évaluation)
+    Les entrées sans mot français sont ignorées
+    """
+    train, evaluation = [], []
+    for entry in entries:
+        french = (entry.get('french') or '').strip()
+        if not french:
+            continue
+        (evaluation if split_of(french) == SPLIT_EVAL else train).append(entry)
+    return train, evaluation
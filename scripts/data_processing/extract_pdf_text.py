@@ -4,7 +4,11 @@ Extrait les lexiques Français-Sara et English-Sara
 """
 
 import pdfplumber
+import hashlib
 import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import re
 from tqdm import tqdm
@@ -13,43 +17,214 @@ BASE_DIR = Path(__file__).parent.parent.parent
 DATA_DIR = BASE_DIR / "data"
 RAW_DIR = DATA_DIR / "raw" / "morkeg"
 PROCESSED_DIR = DATA_DIR / "processed"
+PAGE_CACHE_DIR = PROCESSED_DIR / "page_cache"
+
+# Nombre de processus pour l'extraction (1 = mode séquentiel)
+NUM_WORKERS = os.cpu_count() or 1
+# Nombre de pages par tranche envoyée à un processus
+PAGES_PER_SHARD = 16
 
 def create_dirs():
     """Crée les répertoires nécessaires"""
     PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 
-def extract_text_from_pdf(pdf_path):
+def _extract_pages(args):
+    """
+    Extrait le texte d'une tranche de pages (exécuté dans un processus)
+    Chaque processus ouvre son propre handle pdfplumber
+    
+    Returns:
+        Liste de (index de page, texte) ; texte vide si la page n'a pas de texte
+    """
+    pdf_path, indices = args
+    results = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for index in indices:
+            page = pdf.pages[index]
+            text = page.extract_text() or ''
+            results.append((index, text.strip()))
+            # Libérer le cache de la page (objets layout) au fil de l'eau
+            page.flush_cache()
+    return results
+
+def make_page_shards(indices, pages_per_shard=PAGES_PER_SHARD):
+    """Découpe une liste d'index de pages en tranches contiguës"""
+    return [
+        indices[start:start + pages_per_shard]
+        for start in range(0, len(indices), pages_per_shard)
+    ]
+
+def hash_file(path, chunk_size=1 << 20):
+    """Calcule le SHA-256 d'un fichier sans le charger entièrement"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def cached_file_hash(path):
+    """
+    SHA-256 d'un fichier, mémorisé par (taille, date de modification) dans
+    PAGE_CACHE_DIR/file_hashes.json : une relance ne relit pas tout le PDF
+    """
+    path = Path(path)
+    stat = path.stat()
+    memo_path = PAGE_CACHE_DIR / "file_hashes.json"
+    memo = {}
+    if memo_path.exists():
+        try:
+            with open(memo_path, 'r', encoding='utf-8') as f:
+                memo = json.load(f)
+        except json.JSONDecodeError:
+            memo = {}
+    
+    key = str(path.resolve())
+    known = memo.get(key)
+    if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+        return known['sha256']
+    
+    digest = hash_file(path)
+    memo[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+    PAGE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(memo_path, 'w', encoding='utf-8') as f:
+        json.dump(memo, f, indent=2)
+    return digest
+
+def get_page_cache_path(pdf_path):
+    """
+    Chemin du cache de pages pour un PDF
+    La clé combine le hash du PDF et la version de pdfplumber :
+    un PDF modifié ou une mise à jour de pdfplumber invalide le cache
+    """
+    pdf_hash = cached_file_hash(pdf_path)
+    return PAGE_CACHE_DIR / f"{pdf_hash[:32]}-pdfplumber{pdfplumber.__version__}.jsonl"
+
+def index_page_cache(cache_path):
+    """
+    Indexe le cache de pages (JSON Lines, une ligne par page extraite, plus une
+    ligne {"total_pages": N} écrite à chaque extraction) sans garder les textes
+    
+    Returns:
+        (positions {index de page: position dans le fichier} des pages non vides,
+         ensemble des index de pages extraites, nombre total de pages ou None)
+    """
+    offsets = {}
+    seen = set()
+    total_pages = None
+    if not cache_path.exists():
+        return offsets, seen, total_pages
+    with open(cache_path, 'rb') as f:
+        while True:
+            offset = f.tell()
+            line = f.readline()
+            if not line:
+                break
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Dernière ligne tronquée (exécution interrompue) : on la réextrait
+                continue
+            if 'total_pages' in record:
+                total_pages = record['total_pages']
+                continue
+            seen.add(record['page_index'])
+            if record['text']:
+                offsets[record['page_index']] = offset
+            else:
+                offsets.pop(record['page_index'], None)
+    return offsets, seen, total_pages
+
+def iter_cached_pages(cache_path, offsets):
+    """
+    Génère les pages {'page_num', 'text'} dans l'ordre des pages, en relisant
+    chaque ligne du cache à sa position : une seule page en mémoire à la fois
     """
-    Extrait le texte d'un PDF page par page
+    with open(cache_path, 'rb') as f:
+        for index in sorted(offsets):
+            f.seek(offsets[index])
+            record = json.loads(f.readline())
+            yield {'page_num': index + 1, 'text': record['text']}
+
+def load_cached_pages(pdf_path):
+    """
+    Pages d'un PDF depuis le cache, sans ouvrir le PDF avec pdfplumber
+    Permet de reconstruire les sections de lexique en une fraction de seconde
+    
+    Returns:
+        (fonction sans argument renvoyant un nouvel itérateur de pages, nombre de pages),
+        ou None si le cache est absent ou incomplet
+    """
+    cache_path = get_page_cache_path(pdf_path)
+    offsets, seen, total_pages = index_page_cache(cache_path)
+    if total_pages is None or len(seen) < total_pages:
+        return None
+    return (lambda: iter_cached_pages(cache_path, offsets)), len(offsets)
+
+def extract_text_from_pdf(pdf_path, workers=NUM_WORKERS, use_cache=True):
+    """
+    Extrait le texte d'un PDF page par page dans le cache de pages (JSON Lines)
+    Les textes ne sont pas gardés en mémoire : ils sont relus avec load_cached_pages
     
     Args:
         pdf_path: Chemin vers le PDF
+        workers: Nombre de processus (1 = séquentiel)
+        use_cache: Réutiliser les pages déjà extraites (sinon le cache est réécrit)
         
     Returns:
-        Liste de dictionnaires avec page_num et text
+        True si toutes les pages sont dans le cache, False en cas d'erreur
     """
-    pages_data = []
-    
     print(f"Extraction du texte depuis {pdf_path}...")
+    start_time = time.perf_counter()
     
     try:
         with pdfplumber.open(pdf_path) as pdf:
             total_pages = len(pdf.pages)
+        
+        PAGE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_path = get_page_cache_path(pdf_path)
+        seen = set()
+        if use_cache:
+            _, seen, _ = index_page_cache(cache_path)
+            if seen:
+                print(f"   Cache : {len(seen)}/{total_pages} pages deja extraites ({cache_path.name})")
+        
+        missing = [index for index in range(total_pages) if index not in seen]
+        shards = make_page_shards(missing)
+        workers = max(1, min(workers, len(shards)))
+        tasks = [(str(pdf_path), shard) for shard in shards]
+        
+        cache_file = open(cache_path, 'a' if use_cache else 'w', encoding='utf-8')
+        try:
+            cache_file.write(json.dumps({'total_pages': total_pages}) + '\n')
+            
+            def record(results):
+                for index, text in results:
+                    cache_file.write(json.dumps({'page_index': index, 'text': text}, ensure_ascii=False) + '\n')
+                cache_file.flush()
             
-            for page_num, page in enumerate(tqdm(pdf.pages, desc="Extraction pages", total=total_pages), 1):
-                text = page.extract_text()
-                if text:
-                    pages_data.append({
-                        'page_num': page_num,
-                        'text': text.strip()
-                    })
+            with tqdm(desc="Extraction pages", total=len(missing)) as progress:
+                if workers == 1:
+                    for task in tasks:
+                        record(_extract_pages(task))
+                        progress.update(len(task[1]))
+                else:
+                    print(f"   Mode parallele : {workers} processus, {len(shards)} tranches")
+                    with ProcessPoolExecutor(max_workers=workers) as executor:
+                        for task, results in zip(tasks, executor.map(_extract_pages, tasks)):
+                            record(results)
+                            progress.update(len(task[1]))
+        finally:
+            cache_file.close()
         
-        print(f"OK - {len(pages_data)} pages extraites")
-        return pages_data
+        elapsed = time.perf_counter() - start_time
+        rate = len(missing) / elapsed if elapsed > 0 else float('inf')
+        print(f"OK - {total_pages} pages extraites ({len(missing)} nouvelles) "
+              f"en {elapsed:.1f}s ({rate:.1f} pages/s)")
+        return True
         
     except Exception as e:
         print(f"ERREUR lors de l'extraction : {e}")
-        return []
+        return False
 
 def extract_lexicon_sections(pages_data):
     """
@@ -83,6 +258,139 @@ def extract_lexicon_sections(pages_data):
     
     return sections
 
+# Marqueurs de début de section, par ordre de priorité
+SECTION_MARKERS = {
+    'french_sara': ['Lexique\nFrançais – Langues Sara', 'Lexique Français'],
+    'english_sara': ['Lexique\nEnglish – Sara Languages', 'Lexique English'],
+}
+
+def iter_page_texts(pages):
+    """Génère le texte des pages, séparées par une ligne vide (comme full_text)"""
+    for i, page in enumerate(pages):
+        if i > 0:
+            yield '\n\n'
+        yield page['text']
+
+def _split_sections_pass(pages, markers, f):
+    """
+    Une passe du découpage en flux : écrit les sections dans f (JSON) au fil de l'eau
+    
+    Args:
+        pages: Itérable de pages {'page_num', 'text'}
+        markers: {section: marqueur} utilisé pour chaque section
+        f: Fichier texte de sortie
+        
+    Returns:
+        Dictionnaire {section: nombre de caractères} (None si non trouvée)
+    """
+    french_marker = markers['french_sara']
+    english_marker = markers['english_sara']
+    # Caractères gardés en réserve pour détecter un marqueur à cheval sur deux morceaux
+    keep = max(len(french_marker), len(english_marker)) - 1
+    
+    sizes = {'french_sara': None, 'english_sara': None}
+    state = None
+    carry = ''
+    
+    def emit(text):
+        if state and text:
+            sizes[state] += len(text)
+            f.write(json.dumps(text, ensure_ascii=False)[1:-1])
+    
+    def enter(section):
+        nonlocal state
+        if state:
+            f.write('",\n')
+        elif section == 'english_sara':
+            f.write('  "french_sara": null,\n')
+        f.write(f'  "{section}": "')
+        sizes[section] = 0
+        state = section
+    
+    f.write('{\n')
+    for chunk in iter_page_texts(pages):
+        buffer = carry + chunk
+        while state != 'english_sara':
+            english_pos = buffer.find(english_marker)
+            french_pos = buffer.find(french_marker) if state is None else -1
+            if french_pos != -1 and (english_pos == -1 or french_pos < english_pos):
+                enter('french_sara')
+                buffer = buffer[french_pos:]
+            elif english_pos != -1:
+                emit(buffer[:english_pos])
+                enter('english_sara')
+                buffer = buffer[english_pos:]
+            else:
+                break
+        if len(buffer) > keep:
+            emit(buffer[:len(buffer) - keep])
+            buffer = buffer[len(buffer) - keep:]
+        carry = buffer
+    emit(carry)
+    
+    if state:
+        f.write('"')
+    if state != 'english_sara':
+        if state:
+            f.write(',\n')
+        if state is None:
+            f.write('  "french_sara": null,\n')
+        f.write('  "english_sara": null')
+    f.write('\n}')
+    return sizes
+
+def split_lexicon_sections_to_file(pages_factory, output_path):
+    """
+    Version en flux de extract_lexicon_sections : consomme les pages une à une
+    et écrit les sections directement dans output_path, sans construire full_text
+    Le fichier produit est identique à save_processed_data(extract_lexicon_sections(...))
+    tant que la section Français précède la section English (cas du lexique Morkeg)
+    
+    Args:
+        pages_factory: Fonction sans argument qui renvoie un nouvel itérateur de pages
+                       (une seconde passe n'est faite que si un marqueur principal manque)
+        output_path: Chemin du fichier JSON des sections
+        
+    Returns:
+        Dictionnaire {section: nombre de caractères} (None si non trouvée)
+    """
+    markers = {section: candidates[0] for section, candidates in SECTION_MARKERS.items()}
+    with open(output_path, 'w', encoding='utf-8') as f:
+        sizes = _split_sections_pass(pages_factory(), markers, f)
+    
+    # Marqueur principal absent : refaire la passe avec le marqueur de secours
+    missing = [section for section, size in sizes.items() if size is None]
+    if missing:
+        for section in missing:
+            markers[section] = SECTION_MARKERS[section][1]
+        with open(output_path, 'w', encoding='utf-8') as f:
+            sizes = _split_sections_pass(pages_factory(), markers, f)
+    
+    if sizes['french_sara'] is not None:
+        print(f"OK - Section Français-Sara trouvee ({sizes['french_sara']} caracteres)")
+    if sizes['english_sara'] is not None:
+        print(f"OK - Section English-Sara trouvee ({sizes['english_sara']} caracteres)")
+    print(f"OK - Donnees sauvegardees : {output_path}")
+    return sizes
+
+def save_pages_to_file(pages, output_path):
+    """
+    Écrit les pages au fil de l'eau, au même format que save_processed_data(pages)
+    (liste JSON indentée), sans construire la liste en mémoire
+    
+    Returns:
+        Nombre de pages écrites
+    """
+    count = 0
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for page in pages:
+            f.write('[\n' if count == 0 else ',\n')
+            f.write('  ' + json.dumps(page, ensure_ascii=False, indent=2).replace('\n', '\n  '))
+            count += 1
+        f.write('\n]' if count else '[]')
+    print(f"OK - Donnees sauvegardees : {output_path}")
+    return count
+
 def save_processed_data(data, output_path):
     """Sauvegarde les données traitées en JSON"""
     with open(output_path, 'w', encoding='utf-8') as f:
@@ -100,27 +408,30 @@ def main():
         print("   Execute d'abord : python scripts/data_collection/download_morkeg.py")
         return
     
-    # Extraire le texte
-    pages_data = extract_text_from_pdf(pdf_path)
+    # Extraire le texte (seulement si le cache de pages est incomplet)
+    cached = load_cached_pages(pdf_path)
+    if cached is None:
+        if extract_text_from_pdf(pdf_path):
+            cached = load_cached_pages(pdf_path)
+    else:
+        print("Pages rechargees depuis le cache (PDF non rouvert)")
     
-    if not pages_data:
+    if not cached or not cached[1]:
         print("ERREUR - Aucune donnee extraite")
         return
+    pages_factory, num_pages = cached
     
-    # Sauvegarder les pages brutes
+    # Sauvegarder les pages brutes (en flux, depuis le cache)
     raw_output = PROCESSED_DIR / "morkeg_raw_pages.json"
-    save_processed_data(pages_data, raw_output)
-    
-    # Extraire les sections de lexique
-    sections = extract_lexicon_sections(pages_data)
+    save_pages_to_file(pages_factory(), raw_output)
     
-    # Sauvegarder les sections
+    # Extraire les sections de lexique (en flux, directement sur disque)
     sections_output = PROCESSED_DIR / "morkeg_lexicon_sections.json"
-    save_processed_data(sections, sections_output)
+    sections = split_lexicon_sections_to_file(pages_factory, sections_output)
     
     # Statistiques
     print(f"\nStatistiques d'extraction:")
-    print(f"   Pages totales : {len(pages_data)}")
+    print(f"   Pages totales : {num_pages}")
     print(f"   Sections trouvees : {len([s for s in sections.values() if s])}")
     print(f"\nOK - Extraction terminee !")
     print(f"   Fichiers crees dans : {PROCESSED_DIR}")
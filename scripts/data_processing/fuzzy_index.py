@@ -0,0 +1,161 @@
+"""
+Recherche approximative dans le lexique (fautes de frappe, accents oubliés)
+Index inversé de trigrammes de caractères sur les formes normalisées
+(NFD, sans accents ni tons, minuscules) des mots français et des formes Sara
+"""
+
+import heapq
+import re
+import unicodedata
+from array import array
+from collections import Counter
+from operator import itemgetter
+
+# Signes de ton/diacritiques sans décomposition NFD (cédille isolée du lexique Morkeg)
+EXTRA_MARKS = {'¸': '', 'ˆ': '', '˜': ''}
+NON_WORD_RE = re.compile(r'[^\w]+')
+
+FIELD_FRENCH = 0
+FIELD_SARA = 1
+
+# Nombre maximal de documents lus dans les listes de trigrammes par requête
+# (les trigrammes les plus rares d'abord : ce sont les plus discriminants)
+POSTINGS_BUDGET = 10000
+# Candidats rescorés exactement par résultat demandé
+CANDIDATES_PER_RESULT = 10
+
+def normalize_for_search(text):
+    """
+    Normalise un texte pour la recherche approximative :
+    "À côté de" -> "a cote de", "màs¸" -> "mas"
+    """
+    text = unicodedata.normalize('NFD', text)
+    text = ''.join(
+        EXTRA_MARKS.get(char, char) for char in text
+        if unicodedata.category(char) != 'Mn'
+    )
+    text = NON_WORD_RE.sub(' ', text.lower())
+    return ' '.join(text.split())
+
+def trigrams(normalized):
+    """Ensemble des trigrammes d'un texte normalisé (bordé d'espaces)"""
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class TrigramIndex:
+    """
+    Index inversé trigramme -> documents
+    Un document est une forme (française ou Sara) rattachée à un mot français
+    """
+    
+    def __init__(self):
+        self._postings = {}
+        self._doc_french = array('I')
+        self._doc_field = array('B')
+        self._doc_text = []
+        self._doc_normalized = []
+    
+    def add(self, french_id, field, text):
+        """Ajoute une forme à l'index"""
+        normalized = normalize_for_search(text)
+        if not normalized:
+            return
+        grams = trigrams(normalized)
+        doc_id = len(self._doc_text)
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = array('I')
+            postings.append(doc_id)
+        self._doc_french.append(french_id)
+        self._doc_field.append(field)
+        self._doc_text.append(text)
+        self._doc_normalized.append(normalized)
+    
+    def __len__(self):
+        return len(self._doc_text)
+    
+    @classmethod
+    def from_entries(cls, entries):
+        """Construit l'index depuis les entrées nettoyées (french_id = position dans la liste)"""
+        index = cls()
+        for french_id, entry in enumerate(entries):
+            index.add(french_id, FIELD_FRENCH, entry.get('french', ''))
+            for variant in entry.get('sara_variants', []):
+                index.add(french_id, FIELD_SARA, variant)
+        return index
+    
+    @classmethod
+    def from_store(cls, store):
+        """Construit l'index depuis un LexiconStore (french_id = index du store)"""
+        index = cls()
+        for french_id in range(len(store)):
+            index.add(french_id, FIELD_FRENCH, store.french(french_id))
+            for _, form in store.forms_at(french_id):
+                index.add(french_id, FIELD_SARA, form)
+        return index
+    
+    def search(self, query, k=10, field=None, min_score=0.3):
+        """
+        Recherche les k formes les plus proches de query
+        
+        Le score est le coefficient de Dice sur les trigrammes :
+        2 * trigrammes communs / (trigrammes requête + trigrammes document)
+        
+        Args:
+            query: Texte saisi par l'utilisateur
+            k: Nombre de résultats
+            field: FIELD_FRENCH, FIELD_SARA ou None pour les deux
+            min_score: Score minimal (0-1)
+        
+        Returns:
+            Liste de (score, french_id, forme, champ), un résultat par mot français
+        """
+        normalized = normalize_for_search(query)
+        if not normalized:
+            return []
+        grams = trigrams(normalized)
+        
+        # 1. Candidats : documents partageant les trigrammes les plus rares de la requête
+        #    (Counter.update itère en C sur les tableaux, dans la limite du budget)
+        postings_lists = sorted(
+            (self._postings[gram] for gram in grams if gram in self._postings),
+            key=len
+        )
+        shared = Counter()
+        used = 0
+        for postings in postings_lists:
+            if used and used + len(postings) > POSTINGS_BUDGET:
+                break
+            shared.update(postings[:POSTINGS_BUDGET])
+            used += len(postings)
+        if not shared:
+            return []
+        
+        candidates = shared.items()
+        if field is not None:
+            doc_field = self._doc_field
+            candidates = [item for item in candidates if doc_field[item[0]] == field]
+        candidates = heapq.nlargest(k * CANDIDATES_PER_RESULT, candidates, key=itemgetter(1))
+        
+        # 2. Score exact (coefficient de Dice sur tous les trigrammes) des meilleurs candidats
+        scored = []
+        for doc_id, _ in candidates:
+            doc_grams = trigrams(self._doc_normalized[doc_id])
+            score = 2.0 * len(grams & doc_grams) / (len(grams) + len(doc_grams))
+            if score >= min_score:
+                scored.append((score, doc_id))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        
+        # Un résultat par mot français (plusieurs formes peuvent pointer vers le même mot)
+        results = []
+        seen = set()
+        for score, doc_id in scored:
+            french_id = self._doc_french[doc_id]
+            if french_id in seen:
+                continue
+            seen.add(french_id)
+            results.append((score, french_id, self._doc_text[doc_id], self._doc_field[doc_id]))
+            if len(results) == k:
+                break
+        return results
@@ -0,0 +1,352 @@
+"""
+Stockage colonnaire du lexique : triplets (français, code dialecte, forme Sara)
+Les codes dialectes sont internés en petits entiers, les chaînes dans une table unique
+Le fichier est chargé par memory mapping : aucun JSON à relire pour une recherche
+Index intégré : table de hachage sur les clés françaises normalisées (recherche O(1))
+et clés triées (recherche par préfixe en O(log n))
+"""
+
+import json
+import mmap
+import os
+import struct
+import unicodedata
+import zlib
+from array import array
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.parent
+DATA_DIR = BASE_DIR / "data"
+TRAINING_DIR = DATA_DIR / "training"
+PROCESSED_DIR = DATA_DIR / "processed"
+STORE_FILE = PROCESSED_DIR / "lexicon_store.bin"
+
+STORE_MAGIC = b'TLXS'
+STORE_VERSION = 2
+# Code utilisé pour les formes dont le dialecte est inconnu (anciennes données)
+UNKNOWN_DIALECT = ''
+
+# Format binaire (ordre des octets natif, little-endian sur x86/ARM) :
+#   MAGIC (4 octets) | longueur de l'en-tête JSON (uint32) | en-tête JSON
+#   puis, alignés sur 4 octets :
+#   french_rows  uint32[n_french + 1]  plage de triplets de chaque mot français
+#   hash_slots   uint32[hash_size]     table de hachage (adressage ouvert) : index + 1, 0 = vide
+#   form_ids     uint32[n_triples]     index de la forme Sara dans la table de chaînes
+#   dialect_ids  uint8[n_triples]      index du code dialecte
+#   str_offsets  uint32[n_strings + 1] début de chaque chaîne dans le blob
+#   str_blob     UTF-8
+# Table de chaînes : n_french mots français (triés par clé), puis leurs n_french clés
+# normalisées dans le même ordre, puis les formes Sara
+
+def french_key(french):
+    """Clé de recherche d'un mot français : NFC, insensible à la casse et aux espaces multiples"""
+    return ' '.join(unicodedata.normalize('NFC', french).casefold().split())
+
+def _key_hash(key_bytes):
+    """Hachage stable entre processus (hash() de Python est randomisé)"""
+    return zlib.crc32(key_bytes)
+
+def _hash_size(count):
+    """Taille de la table (puissance de 2, taux de remplissage <= 50 %)"""
+    size = 8
+    while size < 2 * count:
+        size *= 2
+    return size
+
+def _pad4(size):
+    return (4 - size % 4) % 4
+
+def build_store(entries, output_path=STORE_FILE):
+    """
+    Construit le fichier colonnaire à partir des entrées nettoyées
+    
+    Le fichier est écrit à côté (.tmp) puis renommé : un LexiconStore ouvert sur
+    l'ancien fichier garde son memory mapping intact (réécrire le fichier en place
+    tronquerait des pages encore mappées et tuerait le processus lecteur)
+    
+    Args:
+        entries: Itérable d'entrées {'french', 'sara_variants', 'sara_forms'?}
+        output_path: Fichier binaire à écrire
+    
+    Returns:
+        Nombre de triplets écrits
+    """
+    # Regrouper les formes par mot français (clé de recherche)
+    by_key = {}
+    for entry in entries:
+        french = (entry.get('french') or '').strip()
+        if not french:
+            continue
+        pairs = entry.get('sara_forms') or [
+            [UNKNOWN_DIALECT, variant] for variant in entry.get('sara_variants', [])
+        ]
+        key = french_key(french)
+        if key not in by_key:
+            by_key[key] = (french, [])
+        triples = by_key[key][1]
+        for code, form in pairs:
+            if form and (code, form) not in triples:
+                triples.append((code, form))
+    
+    dialects = sorted({code for _, pairs in by_key.values() for code, _ in pairs})
+    dialect_ids = {code: i for i, code in enumerate(dialects)}
+    if len(dialects) > 255:
+        raise ValueError(f"Trop de codes dialectes pour un uint8 : {len(dialects)}")
+    
+    # Table de chaînes : les mots français d'abord (triés), leurs clés, puis les formes internées
+    keys = sorted(by_key)
+    strings = [by_key[key][0] for key in keys] + keys
+    string_ids = {}
+    french_rows = array('I', [0])
+    form_col = array('I')
+    dialect_col = array('B')
+    for key in keys:
+        for code, form in by_key[key][1]:
+            if form not in string_ids:
+                string_ids[form] = len(strings)
+                strings.append(form)
+            form_col.append(string_ids[form])
+            dialect_col.append(dialect_ids[code])
+        french_rows.append(len(form_col))
+    
+    encoded = [s.encode('utf-8') for s in strings]
+    
+    # Table de hachage à sondage linéaire sur les clés normalisées
+    hash_size = _hash_size(len(keys))
+    hash_slots = array('I', [0]) * hash_size
+    for french_id in range(len(keys)):
+        slot = _key_hash(encoded[len(keys) + french_id]) & (hash_size - 1)
+        while hash_slots[slot]:
+            slot = (slot + 1) & (hash_size - 1)
+        hash_slots[slot] = french_id + 1
+    str_offsets = array('I', [0])
+    for data in encoded:
+        str_offsets.append(str_offsets[-1] + len(data))
+    
+    header = json.dumps({
+        'version': STORE_VERSION,
+        'dialects': dialects,
+        'n_french': len(keys),
+        'n_triples': len(form_col),
+        'n_strings': len(strings),
+        'hash_size': hash_size,
+    }, ensure_ascii=False).encode('utf-8')
+    header += b' ' * _pad4(len(STORE_MAGIC) + 4 + len(header))
+    
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(output_path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(STORE_MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        f.write(french_rows.tobytes())
+        f.write(hash_slots.tobytes())
+        f.write(form_col.tobytes())
+        f.write(dialect_col.tobytes())
+        f.write(b'\0' * _pad4(len(dialect_col)))
+        f.write(str_offsets.tobytes())
+        f.write(b''.join(encoded))
+    os.replace(tmp_path, output_path)
+    
+    return len(form_col)
+
+class LexiconStore:
+    """
+    Lecture du lexique colonnaire par memory mapping
+    Le chargement ne lit que l'en-tête ; les colonnes sont des vues sur le fichier
+    """
+    
+    def __init__(self, path=STORE_FILE):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        # En-tête lu directement sur le mmap : aucune vue n'existe encore, close() peut le libérer
+        if self._mmap[:4] != STORE_MAGIC or len(self._mmap) < 8:
+            self.close()
+            raise ValueError(f"Fichier de lexique invalide : {self.path}")
+        (header_len,) = struct.unpack_from('<I', self._mmap, 4)
+        try:
+            header = json.loads(self._mmap[8:8 + header_len].decode('utf-8'))
+        except ValueError:
+            self.close()
+            raise ValueError(f"Fichier de lexique invalide : {self.path}")
+        if header.get('version') != STORE_VERSION:
+            self.close()
+            raise ValueError(f"Version de lexique non supportee : {header.get('version')} "
+                             f"(reconstruire avec lexicon_store.py)")
+        buffer = memoryview(self._mmap)
+        
+        self.dialects = header['dialects']
+        self._dialect_ids = {code: i for i, code in enumerate(self.dialects)}
+        self.n_french = header['n_french']
+        self.n_triples = header['n_triples']
+        n_strings = header['n_strings']
+        self._hash_size = header['hash_size']
+        
+        pos = 8 + header_len
+        def take(count, size, fmt):
+            nonlocal pos
+            view = buffer[pos:pos + count * size].cast(fmt)
+            pos += count * size
+            return view
+        
+        self._french_rows = take(self.n_french + 1, 4, 'I')
+        self._hash_slots = take(self._hash_size, 4, 'I')
+        self._form_ids = take(self.n_triples, 4, 'I')
+        self._dialect_col = take(self.n_triples, 1, 'B')
+        pos += _pad4(self.n_triples)
+        self._str_offsets = take(n_strings + 1, 4, 'I')
+        self._blob = buffer[pos:]
+    
+    def close(self):
+        """Libère le memory mapping"""
+        for name in ('_french_rows', '_hash_slots', '_form_ids', '_dialect_col', '_str_offsets', '_blob'):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        if getattr(self, '_mmap', None) is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def __len__(self):
+        return self.n_french
+    
+    def string(self, string_id):
+        """Décode une chaîne de la table"""
+        start = self._str_offsets[string_id]
+        end = self._str_offsets[string_id + 1]
+        return bytes(self._blob[start:end]).decode('utf-8')
+    
+    def french(self, french_id):
+        """Mot français d'index french_id"""
+        return self.string(french_id)
+    
+    def key(self, french_id):
+        """Clé normalisée du mot français d'index french_id"""
+        return self.string(self.n_french + french_id)
+    
+    def _key_bytes(self, french_id):
+        start = self._str_offsets[self.n_french + french_id]
+        end = self._str_offsets[self.n_french + french_id + 1]
+        return self._blob[start:end]
+    
+    def find(self, french):
+        """Index du mot français via la table de hachage, ou None"""
+        key_bytes = french_key(french).encode('utf-8')
+        mask = self._hash_size - 1
+        slot = _key_hash(key_bytes) & mask
+        while True:
+            value = self._hash_slots[slot]
+            if not value:
+                return None
+            if self._key_bytes(value - 1) == key_bytes:
+                return value - 1
+            slot = (slot + 1) & mask
+    
+    def prefix(self, prefix, limit=10):
+        """
+        Mots français dont la clé commence par prefix (ordre alphabétique)
+        Recherche dichotomique sur les clés triées puis parcours séquentiel
+        
+        Returns:
+            Liste d'index de mots français (au plus limit)
+        """
+        prefix_key = french_key(prefix)
+        low, high = 0, self.n_french
+        while low < high:
+            mid = (low + high) // 2
+            if self.key(mid) < prefix_key:
+                low = mid + 1
+            else:
+                high = mid
+        results = []
+        while low < self.n_french and len(results) < limit and self.key(low).startswith(prefix_key):
+            results.append(low)
+            low += 1
+        return results
+    
+    def forms_at(self, french_id, dialect=None):
+        """Couples (code dialecte, forme) d'un mot français, filtrés par dialecte si demandé"""
+        dialect_id = None
+        if dialect is not None:
+            dialect_id = self._dialect_ids.get(dialect)
+            if dialect_id is None:
+                return []
+        forms = []
+        for row in range(self._french_rows[french_id], self._french_rows[french_id + 1]):
+            code = self._dialect_col[row]
+            if dialect_id is None or code == dialect_id:
+                forms.append((self.dialects[code], self.string(self._form_ids[row])))
+        return forms
+    
+    def lookup(self, french, dialect=None):
+        """
+        Traductions Sara d'un mot français
+        
+        Args:
+            french: Mot français (casse ignorée)
+            dialect: Code dialecte (ex: 'Ngb', 'Mb') ou None pour tous
+        
+        Returns:
+            Liste de (code dialecte, forme)
+        """
+        french_id = self.find(french)
+        if french_id is None:
+            return []
+        return self.forms_at(french_id, dialect)
+    
+    def iter_dialect(self, dialect):
+        """Parcourt les colonnes et génère (français, forme) pour un dialecte"""
+        dialect_id = self._dialect_ids.get(dialect)
+        if dialect_id is None:
+            return
+        french_id = 0
+        for row in range(self.n_triples):
+            if self._dialect_col[row] != dialect_id:
+                continue
+            while self._french_rows[french_id + 1] <= row:
+                french_id += 1
+            yield self.french(french_id), self.string(self._form_ids[row])
+    
+    def dialect_counts(self):
+        """Nombre de formes par code dialecte"""
+        counts = [0] * len(self.dialects)
+        for code in self._dialect_col:
+            counts[code] += 1
+        return dict(zip(self.dialects, counts))
+
+def main():
+    """Construit le lexique colonnaire depuis training_data_cleaned.json"""
+    print("="*60)
+    print("Construction du lexique colonnaire (dialectes)")
+    print("="*60)
+    
+    data_file = TRAINING_DIR / "training_data_cleaned.json"
+    if not data_file.exists():
+        print(f"ERREUR - Fichier introuvable : {data_file}")
+        print("Execute d'abord : python scripts/data_processing/clean_and_normalize.py")
+        return
+    
+    with open(data_file, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    
+    n_triples = build_store(entries, STORE_FILE)
+    
+    with LexiconStore(STORE_FILE) as store:
+        print(f"   {len(store)} mots francais, {n_triples} formes Sara")
+        for code, count in sorted(store.dialect_counts().items(), key=lambda x: -x[1]):
+            print(f"   {code or '(inconnu)'} : {count} formes")
+    
+    print(f"\nOK - Lexique sauvegarde : {STORE_FILE}")
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,10 @@ Convertit les lexiques en format adapté pour le fine-tuning
 """
 
 import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
 import re
 from tqdm import tqdm
@@ -13,129 +17,311 @@ DATA_DIR = BASE_DIR / "data"
 PROCESSED_DIR = DATA_DIR / "processed"
 TRAINING_DIR = DATA_DIR / "training"
 
+# Nombre de processus pour le parsing des sections (1 = mode séquentiel)
+NUM_WORKERS = os.cpu_count() or 1
+# Morceaux par processus (plusieurs pour équilibrer la charge)
+CHUNKS_PER_WORKER = 4
+# Morceaux en cours par processus : borne les résultats gardés en mémoire
+MAX_PENDING_PER_WORKER = 2
+
 def create_dirs():
     """Crée les répertoires nécessaires"""
     TRAINING_DIR.mkdir(parents=True, exist_ok=True)
 
-def parse_lexicon_entries(text):
+# Codes de langues Sara (abréviations)
+SARA_CODES = ['Beb', 'Bd', 'Gor', 'Gu', 'Kbb', 'Db', 'Mb', 'Mo', 'Nar', 'KbN', 'NgT', 'Ngb', 'Sr', 'Lk', 'Kul']
+SARA_CODE_SET = frozenset(SARA_CODES)
+
+# Expressions compilées une seule fois pour tout le lexique
+# Paire code=forme (ex: Beb=mbô)
+CODE_PAIR_RE = re.compile(r'([A-Z][a-z]?[A-Z]?)=([^:,\n]+)')
+# Présence d'un code de langue dans une ligne
+HAS_CODE_RE = re.compile(r'[A-Z][a-z]?[A-Z]?=')
+# Tous les codes Sara connus en une seule alternance (les plus longs d'abord)
+KNOWN_CODE_RE = re.compile(
+    r'(?:' + '|'.join(sorted(SARA_CODES, key=len, reverse=True)) + r')=[^:,\s]+'
+)
+SEPARATORS_RE = re.compile(r'[:,\s]+')
+EDGE_PUNCT_RE = re.compile(r'^[,:;\s]+|[,:;\s]+$')
+PAGE_NUM_RE = re.compile(r'^\d+\s+')
+
+# Types de tokens produits par tokenize_lexicon_line
+TOKEN_SARA = 'sara'
+TOKEN_FRENCH = 'french'
+
+def tokenize_lexicon_line(line):
     """
-    Parse les entrées du lexique depuis le texte extrait
+    Découpe une ligne contenant des codes de langues en tokens typés
+    
+    Returns:
+        Liste de tuples (type, code, valeur) :
+        - (TOKEN_SARA, code dialecte, forme Sara) pour chaque code connu
+        - (TOKEN_FRENCH, None, glose) si du texte reste après les codes
+    """
+    tokens = []
+    for match in CODE_PAIR_RE.finditer(line):
+        code = match.group(1)
+        if code not in SARA_CODE_SET:
+            continue
+        # Nettoyer les caractères parasites
+        word = EDGE_PUNCT_RE.sub('', match.group(2).strip().rstrip(',').strip())
+        if word:
+            tokens.append((TOKEN_SARA, code, word))
+    
+    # Ce qui reste une fois les codes et séparateurs enlevés
+    remaining = KNOWN_CODE_RE.sub('', line)
+    remaining = EDGE_PUNCT_RE.sub('', SEPARATORS_RE.sub(' ', remaining).strip())
+    if remaining:
+        tokens.append((TOKEN_FRENCH, None, remaining))
+    
+    return tokens
+
+def is_header_line(line):
+    """Lignes d'en-tête et numéros de page à ignorer"""
+    return 'Lexique' in line or 'Introduction' in line or line.startswith('Page') or (line.isdigit() and len(line) < 4)
+
+def is_french_gloss(text):
+    """Ce qui reste d'une ligne ressemble à du français (longueur raisonnable, pas de =)"""
+    return bool(text) and 2 < len(text) < 200 and '=' not in text
+
+def make_entry(french, sara_words, sara_forms):
+    """
+    Construit une entrée du lexique
+    sara_variants garde le format historique (formes sans doublons, dans l'ordre
+    d'apparition pour que la sortie soit reproductible d'une exécution à l'autre),
+    sara_forms conserve le dialecte de chaque forme : [[code, forme], ...]
+    """
+    return {
+        'french': french,
+        'sara_variants': list(dict.fromkeys(sara_words)),
+        'sara_forms': [list(pair) for pair in dict.fromkeys(sara_forms)]
+    }
+
+def iter_lexicon_entries(lines):
+    """
+    Parse les entrées du lexique ligne par ligne et les produit au fur et à mesure
     Format réel observé:
     - "à côté de acide : être" (ligne avec français)
     - "Beb=mbô : Bd=rû Beb=màs¸ : Bd=màs¸" (ligne avec codes Sara)
     - Parfois français et codes sur la même ligne
-    """
-    entries = []
-    lines = text.split('\n')
     
-    # Codes de langues Sara (abréviations)
-    sara_codes = ['Beb', 'Bd', 'Gor', 'Gu', 'Kbb', 'Db', 'Mb', 'Mo', 'Nar', 'KbN', 'NgT', 'Ngb', 'Sr', 'Lk', 'Kul']
+    Args:
+        lines: Itérable de lignes (liste, fichier ouvert, générateur...)
+        
+    Yields:
+        Dictionnaires {'french', 'sara_variants'}
+    """
+    lines = iter(lines)
     
     current_french = None
     accumulated_sara = []
+    # Couples (code dialecte, forme) dans le même ordre que accumulated_sara
+    accumulated_forms = []
     
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
+    raw_line = next(lines, None)
+    while raw_line is not None:
+        # Une ligne d'avance suffit pour détecter le français qui suit des codes
+        next_raw_line = next(lines, None)
+        line = raw_line.strip()
+        raw_line = next_raw_line
         
         if not line or len(line) < 2:
-            i += 1
             continue
         
         # Ignorer les lignes d'en-tête
-        if 'Lexique' in line or 'Introduction' in line or line.startswith('Page') or (line.isdigit() and len(line) < 4):
-            i += 1
+        if is_header_line(line):
             continue
         
         # Pattern 1: Ligne avec codes de langues (ex: Beb=mbô : Bd=rû)
-        sara_matches = re.findall(r'([A-Z][a-z]?[A-Z]?)=([^:,\n]+)', line)
-        
-        if sara_matches:
-            # Extraire les mots Sara de cette ligne
-            sara_words = []
-            for code, word in sara_matches:
-                word = word.strip().rstrip(',').strip()
-                # Nettoyer les caractères parasites
-                word = re.sub(r'^[,:;\s]+|[,:;\s]+$', '', word)
-                if word and len(word) > 0 and code in sara_codes:
-                    sara_words.append(word)
-            
-            if sara_words:
-                accumulated_sara.extend(sara_words)
-            
-            # Chercher du français dans cette ligne (après les codes)
-            # Enlever tous les codes de langues
-            remaining = line
-            for code in sara_codes:
-                remaining = re.sub(rf'{code}=[^:,\s]+', '', remaining)
-            # Enlever les séparateurs
-            remaining = re.sub(r'[:,\s]+', ' ', remaining).strip()
-            # Enlever les caractères parasites
-            remaining = re.sub(r'^[,:;\s]+|[,:;\s]+$', '', remaining)
+        if CODE_PAIR_RE.search(line):
+            remaining = None
+            for kind, code, value in tokenize_lexicon_line(line):
+                if kind == TOKEN_SARA:
+                    accumulated_sara.append(value)
+                    accumulated_forms.append((code, value))
+                else:
+                    remaining = value
             
             # Si ce qui reste ressemble à du français (longueur raisonnable, pas de =)
-            if remaining and len(remaining) > 2 and len(remaining) < 200 and '=' not in remaining:
+            if is_french_gloss(remaining):
                 # C'est probablement du français
                 if accumulated_sara:
-                    entries.append({
-                        'french': remaining,
-                        'sara_variants': list(set(accumulated_sara))
-                    })
+                    yield make_entry(remaining, accumulated_sara, accumulated_forms)
                     accumulated_sara = []
+                    accumulated_forms = []
                 current_french = None
-                i += 1
                 continue
             
             # Si pas de français dans cette ligne, vérifier la suivante
-            if i + 1 < len(lines):
-                next_line = lines[i + 1].strip()
+            if next_raw_line is not None:
+                next_line = next_raw_line.strip()
                 # Si la ligne suivante n'a pas de codes de langues, c'est probablement un nouveau mot français
-                if next_line and len(next_line) > 2 and not re.search(r'[A-Z][a-z]?[A-Z]?=', next_line):
+                if next_line and len(next_line) > 2 and not HAS_CODE_RE.search(next_line):
                     # Sauvegarder l'entrée actuelle si on a des données
                     if accumulated_sara and current_french:
-                        entries.append({
-                            'french': current_french,
-                            'sara_variants': list(set(accumulated_sara))
-                        })
+                        yield make_entry(current_french, accumulated_sara, accumulated_forms)
                         accumulated_sara = []
+                        accumulated_forms = []
                     # Le français suivant devient le nouveau
                     french_clean = next_line.strip().rstrip(':').strip()
-                    french_clean = re.sub(r'^\d+\s+', '', french_clean)
+                    french_clean = PAGE_NUM_RE.sub('', french_clean)
                     if len(french_clean) > 2 and len(french_clean) < 200:
                         current_french = french_clean
-                    i += 1  # Passer la ligne suivante aussi
+                    # La ligne suivante est tout de même retraitée au tour suivant
                     continue
         
         # Pattern 2: Ligne avec juste du français (sans codes de langues)
-        elif not re.search(r'[A-Z][a-z]?[A-Z]?=', line):
+        elif not HAS_CODE_RE.search(line):
             # C'est probablement une ligne de français
             french = line.strip().rstrip(':').strip()
             # Nettoyer (enlever les numéros de page, etc.)
-            french = re.sub(r'^\d+\s+', '', french)
+            french = PAGE_NUM_RE.sub('', french)
             # Enlever caractères parasites
-            french = re.sub(r'^[,:;\s]+|[,:;\s]+$', '', french)
+            french = EDGE_PUNCT_RE.sub('', french)
             
             if len(french) > 2 and len(french) < 200:
                 # Si on avait des traductions Sara accumulées, les sauvegarder
                 if accumulated_sara and current_french:
-                    entries.append({
-                        'french': current_french,
-                        'sara_variants': list(set(accumulated_sara))
-                    })
+                    yield make_entry(current_french, accumulated_sara, accumulated_forms)
                     accumulated_sara = []
+                    accumulated_forms = []
                 
                 current_french = french
-        
-        i += 1
     
     # Sauvegarder la dernière entrée si nécessaire
     if accumulated_sara and current_french:
-        entries.append({
-            'french': current_french,
-            'sara_variants': list(set(accumulated_sara))
-        })
+        yield make_entry(current_french, accumulated_sara, accumulated_forms)
+
+def parse_lexicon_entries(text):
+    """
+    Parse les entrées du lexique depuis le texte extrait
+    Version liste de iter_lexicon_entries
+    """
+    return list(iter_lexicon_entries(text.split('\n')))
+
+def closes_entry(line):
+    """
+    Vrai si le parser termine forcément une entrée sur cette ligne :
+    codes Sara + français sur la même ligne. Après elle, l'état du parser
+    (français courant, formes accumulées) est vide quel que soit ce qui précède,
+    ce qui permet de découper le texte à cet endroit
+    """
+    line = line.strip()
+    if len(line) < 2 or is_header_line(line) or not CODE_PAIR_RE.search(line):
+        return False
+    tokens = tokenize_lexicon_line(line)
+    has_sara = any(kind == TOKEN_SARA for kind, _, _ in tokens)
+    return has_sara and is_french_gloss(tokens[-1][2] if tokens[-1][0] == TOKEN_FRENCH else None)
+
+def split_at_safe_boundaries(text, num_chunks):
+    """
+    Découpe une section en morceaux parsables indépendamment
+    Chaque coupure est placée juste après une ligne qui termine une entrée
+    (voir closes_entry), près de la taille cible len(text) / num_chunks
+    
+    Returns:
+        Liste de morceaux de texte ; les lignes de tous les morceaux mises bout
+        à bout sont exactement text.split('\\n')
+    """
+    if num_chunks <= 1:
+        return [text]
+    target = max(1, len(text) // num_chunks)
+    chunks = []
+    chunk_start = 0
+    search_pos = target
+    while search_pos < len(text):
+        # Début de la ligne qui suit search_pos
+        line_start = text.find('\n', search_pos)
+        boundary = -1
+        while line_start != -1:
+            line_end = text.find('\n', line_start + 1)
+            if line_end == -1:
+                break
+            if closes_entry(text[line_start + 1:line_end]):
+                boundary = line_end
+                break
+            line_start = line_end
+        if boundary == -1:
+            break
+        chunks.append(text[chunk_start:boundary])
+        chunk_start = boundary + 1
+        search_pos = max(chunk_start, len(chunks) * target + target)
+    chunks.append(text[chunk_start:])
+    return chunks
+
+def _parse_chunk(chunk):
+    """Parse un morceau de section (exécuté dans un processus)"""
+    return parse_lexicon_entries(chunk)
+
+def iter_sections_entries_parallel(texts, workers=NUM_WORKERS):
+    """
+    Parse plusieurs sections en parallèle, découpées en morceaux sûrs
+    Les résultats sont fusionnés dans l'ordre des morceaux : la sortie est
+    identique à celle du parsing séquentiel de chaque section
+    Chaque morceau est produit dès qu'il est prêt (et que les précédents l'ont été),
+    avec au plus workers * MAX_PENDING_PER_WORKER morceaux soumis en avance
+    
+    Args:
+        texts: Liste des textes de section
+        workers: Nombre de processus
+        
+    Yields:
+        (index de la section, entrée)
+    """
+    tasks = []
+    for section_index, text in enumerate(texts):
+        for chunk in split_at_safe_boundaries(text, workers * CHUNKS_PER_WORKER):
+            tasks.append((section_index, chunk))
     
-    return entries
+    max_pending = workers * MAX_PENDING_PER_WORKER
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for section_index, chunk in tasks:
+            pending.append((section_index, executor.submit(_parse_chunk, chunk)))
+            if len(pending) < max_pending:
+                continue
+            section_index, future = pending.popleft()
+            for entry in future.result():
+                yield section_index, entry
+        while pending:
+            section_index, future = pending.popleft()
+            for entry in future.result():
+                yield section_index, entry
+
+def iter_text_lines(text):
+    """Génère les lignes d'un texte sans construire la liste complète (équivalent à split('\\n'))"""
+    start = 0
+    while True:
+        end = text.find('\n', start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+def write_jsonl(entries, output_path):
+    """
+    Écrit les entrées en JSON Lines au fur et à mesure (une entrée par ligne)
+    
+    Returns:
+        Nombre d'entrées écrites
+    """
+    count = 0
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            count += 1
+            # Rendre les entrées visibles aux étapes suivantes sans attendre la fin
+            if count % 1000 == 0:
+                f.flush()
+    return count
+
+def iter_jsonl(path):
+    """Lit un fichier JSON Lines entrée par entrée (sans charger tout le fichier)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
 
 def create_training_examples(entries, max_examples=1000):
     """
@@ -144,7 +330,7 @@ def create_training_examples(entries, max_examples=1000):
     """
     training_examples = []
     
-    for entry in tqdm(entries[:max_examples], desc="Creation exemples"):
+    for entry in tqdm(islice(entries, max_examples), desc="Creation exemples"):
         french = entry.get('french', '').strip()
         sara_variants = entry.get('sara_variants', [])
         
@@ -211,35 +397,46 @@ def main():
     if not sections:
         return
     
-    all_entries = []
-    
-    # Traiter la section Français-Sara
-    if sections.get('french_sara'):
-        print("\n[2/4] Traitement de la section Français-Sara...")
-        entries = parse_lexicon_entries(sections['french_sara'])
-        print(f"   {len(entries)} entrees trouvees")
-        all_entries.extend(entries)
+    section_keys = [
+        (step, key, label)
+        for step, key, label in (("2/4", 'french_sara', 'Français-Sara'),
+                                 ("3/4", 'english_sara', 'English-Sara'))
+        if sections.get(key)
+    ]
     
-    # Traiter la section English-Sara
-    if sections.get('english_sara'):
-        print("\n[3/4] Traitement de la section English-Sara...")
-        entries = parse_lexicon_entries(sections['english_sara'])
-        print(f"   {len(entries)} entrees trouvees")
-        all_entries.extend(entries)
+    def iter_all_entries():
+        """Enchaîne les entrées des deux sections sans les garder en mémoire"""
+        if NUM_WORKERS > 1:
+            print(f"\n[2-3/4] Traitement des sections en parallele ({NUM_WORKERS} processus)...")
+            counts = [0] * len(section_keys)
+            texts = [sections[key] for _, key, _ in section_keys]
+            for section_index, entry in iter_sections_entries_parallel(texts, NUM_WORKERS):
+                counts[section_index] += 1
+                yield entry
+            for (_, _, label), count in zip(section_keys, counts):
+                print(f"   Section {label} : {count} entrees trouvees")
+            return
+        
+        for step, key, label in section_keys:
+            print(f"\n[{step}] Traitement de la section {label}...")
+            count = 0
+            for entry in iter_lexicon_entries(iter_text_lines(sections[key])):
+                count += 1
+                yield entry
+            print(f"   {count} entrees trouvees")
     
-    print(f"\nTotal d'entrees : {len(all_entries)}")
+    # Écrire les entrées brutes en JSON Lines au fil du parsing
+    raw_entries_file = TRAINING_DIR / "lexicon_entries_raw.jsonl"
+    total_entries = write_jsonl(iter_all_entries(), raw_entries_file)
     
-    # Sauvegarder d'abord les entrées brutes du lexique
+    print(f"\nTotal d'entrees : {total_entries}")
     print("\n[4/5] Sauvegarde des entrees brutes du lexique...")
-    raw_entries_file = TRAINING_DIR / "lexicon_entries_raw.json"
-    with open(raw_entries_file, 'w', encoding='utf-8') as f:
-        json.dump(all_entries, f, ensure_ascii=False, indent=2)
-    print(f"   {len(all_entries)} entrees brutes sauvegardees : {raw_entries_file}")
+    print(f"   {total_entries} entrees brutes sauvegardees : {raw_entries_file}")
     
     # Créer les exemples d'entraînement seulement si on a des entrées
     print("\n[5/5] Creation des exemples d'entrainement...")
-    if all_entries:
-        training_examples = create_training_examples(all_entries, max_examples=2000)
+    if total_entries:
+        training_examples = create_training_examples(iter_jsonl(raw_entries_file), max_examples=2000)
         print(f"   {len(training_examples)} exemples crees")
         
         # Sauvegarder les données d'entraînement
@@ -255,12 +452,12 @@ def main():
     
     # Statistiques
     print(f"\nStatistiques:")
-    print(f"   Entrees de lexique : {len(all_entries)}")
-    if all_entries:
+    print(f"   Entrees de lexique : {total_entries}")
+    if total_entries:
         print(f"   Exemples d'entrainement : {len(training_examples)}")
     print(f"\nOK - Preparation terminee !")
     
-    if all_entries:
+    if total_entries:
         print(f"   Prochaine etape : Nettoyage et normalisation")
         print(f"   python scripts/data_processing/clean_and_normalize.py")
     else:
@@ -0,0 +1,290 @@
+"""
+Conversation avec les personnages (Nouba, ami virtuel, etc.) : génération en streaming
+Chaque session garde le cache clés/valeurs (KV) du modèle : un nouveau tour ne traite
+que les tokens du nouveau message, pas toute la conversation
+Les sessions inactives sont libérées (LRU, nombre maximal et budget mémoire)
+Le cache de la consigne de chaque personnage est calculé une seule fois et copié
+au début de chaque conversation (partagé entre tous les utilisateurs)
+"""
+
+import copy
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import torch
+from transformers import AutoTokenizer
+
+BASE_DIR = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts" / "training"))
+
+from fine_tune_llm import resolve_device, resolve_precision, PRECISION_DTYPES
+from inference_engine import load_config, get_model_dir, load_model
+
+# Sessions gardées en mémoire au maximum
+MAX_SESSIONS = 32
+# Mémoire totale des caches KV des sessions (Mo)
+MEMORY_BUDGET_MB = 512
+# Tokens générés au maximum par réponse
+MAX_NEW_TOKENS = 128
+# 0 = décodage glouton
+TEMPERATURE = 0.7
+USER_NAME = "Utilisateur"
+
+def persona_prompt(character):
+    """Consigne de rôle d'un personnage (depuis config.yaml)"""
+    return (
+        f"Tu es {character['name']}, {character['description'][0].lower()}{character['description'][1:]}. "
+        f"Ton caractère : {character['personality']}. "
+        "Tu aides l'utilisateur à pratiquer les langues du Tchad (sara, gambaye, mbaye) "
+        "en mélangeant le français et le sara. Réponds en une ou deux phrases.\n"
+    )
+
+def format_turn(character, message):
+    """Tour de parole : message de l'utilisateur puis invite de réponse du personnage"""
+    return f"\n{USER_NAME}: {message.strip()}\n{character['name']}:"
+
+def cache_nbytes(cache):
+    """Taille en octets d'un cache KV (DynamicCache ou tuples par couche)"""
+    if cache is None:
+        return 0
+    if hasattr(cache, 'to_legacy_cache'):
+        cache = cache.to_legacy_cache()
+    return sum(tensor.numel() * tensor.element_size() for layer in cache for tensor in layer)
+
+class ChatSession:
+    """État d'une conversation : cache KV et historique"""
+    
+    def __init__(self, character):
+        self.character = character
+        self.cache = None
+        # Tokens déjà traités (présents dans le cache)
+        self.length = 0
+        self.history = []
+        # Le cache se termine par le retour à la ligne qui a clos la dernière réponse
+        self.ends_with_newline = False
+        self.nbytes = 0
+        self.lock = threading.Lock()
+
+class ChatEngine:
+    """
+    Génération token par token avec réutilisation du cache KV de chaque session
+    
+    stream_reply() est un générateur de morceaux de texte, utilisable
+    directement avec st.write_stream()
+    """
+    
+    def __init__(self, model, tokenizer, device='cpu', max_sessions=MAX_SESSIONS,
+                 memory_budget_mb=MEMORY_BUDGET_MB, max_new_tokens=MAX_NEW_TOKENS,
+                 temperature=TEMPERATURE):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = device
+        self.max_sessions = max_sessions
+        self.memory_budget = memory_budget_mb * 2**20
+        self.max_new_tokens = max_new_tokens
+        self.temperature = temperature
+        self.max_context = getattr(model.config, 'max_position_embeddings', 2048)
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        # Nom du personnage -> (cache KV de la consigne, nombre de tokens)
+        self._persona_states = {}
+    
+    @classmethod
+    def from_config(cls, config=None, **kwargs):
+        """Charge le modèle fine-tuné (fusionné) depuis config.yaml"""
+        config = config or load_config()
+        device = resolve_device(config['model'])
+        precision = resolve_precision(config['training'], device)
+        model_dir = get_model_dir(config)
+        tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+        model = load_model(model_dir, device, PRECISION_DTYPES[precision], merge=True)
+        engine = cls(model, tokenizer, device=device, **kwargs)
+        engine.warm_personas(config['characters'])
+        return engine
+    
+    def _get_session(self, session_id, character):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or session.character['name'] != character['name']:
+                session = self._sessions[session_id] = ChatSession(character)
+            self._sessions.move_to_end(session_id)
+            return session
+    
+    def reset(self, session_id):
+        """Oublie une conversation"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+    
+    def _evict(self):
+        """Libère les sessions les moins récentes au-delà du nombre maximal ou du budget mémoire"""
+        with self._lock:
+            total = sum(session.nbytes for session in self._sessions.values())
+            while len(self._sessions) > 1 and (len(self._sessions) > self.max_sessions or total > self.memory_budget):
+                _, session = self._sessions.popitem(last=False)
+                total -= session.nbytes
+    
+    def _encode(self, text, first=False):
+        return self.tokenizer(text, add_special_tokens=first)['input_ids']
+    
+    @torch.inference_mode()
+    def _persona_state(self, character):
+        """Cache KV de la consigne d'un personnage (calculé au premier appel)"""
+        state = self._persona_states.get(character['name'])
+        if state is None:
+            ids = self._encode(persona_prompt(character), first=True)
+            output = self.model(input_ids=torch.tensor([ids], device=self.device), use_cache=True)
+            state = (output.past_key_values, len(ids))
+            with self._lock:
+                state = self._persona_states.setdefault(character['name'], state)
+        return state
+    
+    def warm_personas(self, characters):
+        """Précalcule le cache des consignes de tous les personnages (au démarrage)"""
+        for character in characters:
+            self._persona_state(character)
+    
+    def _start_session(self, session):
+        """
+        Session vide : part d'une copie du cache de la consigne du personnage
+        (copie, car le cache d'une session grandit à chaque tour)
+        """
+        cache, length = self._persona_state(session.character)
+        session.cache = copy.deepcopy(cache)
+        session.length = length
+        session.ends_with_newline = False
+    
+    def _rebuild_ids(self, session, message):
+        """
+        Contexte plein : le cache repart de celui de la consigne et la conversation
+        est réencodée avec les derniers tours qui tiennent dans la moitié du contexte
+        """
+        self._start_session(session)
+        ids = self._encode(format_turn(session.character, message))
+        budget = self.max_context // 2 - len(ids)
+        turns = []
+        for user_message, reply in reversed(session.history):
+            turn = self._encode(format_turn(session.character, user_message) + ' ' + reply)
+            if len(turn) > budget:
+                break
+            budget -= len(turn)
+            turns.insert(0, turn)
+        return [token for turn in turns for token in turn] + ids
+    
+    def _forward(self, session, ids):
+        """Passe les nouveaux tokens au modèle ; renvoie les logits du dernier"""
+        input_ids = torch.tensor([ids], device=self.device)
+        output = self.model(input_ids=input_ids, past_key_values=session.cache, use_cache=True)
+        session.cache = output.past_key_values
+        session.length += len(ids)
+        return output.logits[0, -1]
+    
+    def _next_token(self, logits):
+        if self.temperature <= 0:
+            return int(logits.argmax())
+        probs = torch.softmax(logits.float() / self.temperature, dim=-1)
+        return int(torch.multinomial(probs, 1))
+    
+    @torch.inference_mode()
+    def stream_reply(self, session_id, character, message):
+        """
+        Répond au message de l'utilisateur en générant le texte au fil de l'eau
+        
+        Args:
+            session_id: Identifiant de la conversation (une par utilisateur)
+            character: Personnage de config.yaml
+            message: Message de l'utilisateur
+        
+        Yields:
+            Morceaux de texte de la réponse
+        """
+        session = self._get_session(session_id, character)
+        try:
+            with session.lock:
+                if session.cache is None:
+                    self._start_session(session)
+                turn = format_turn(character, message)
+                if session.ends_with_newline:
+                    # Le retour à la ligne qui ouvre le tour est déjà dans le cache
+                    turn = turn[1:]
+                ids = self._encode(turn)
+                if session.length + len(ids) + self.max_new_tokens > self.max_context:
+                    ids = self._rebuild_ids(session, message)
+                
+                generated = []
+                reply = ''
+                # Token déjà affiché mais pas encore passé au modèle
+                pending = None
+                try:
+                    logits = self._forward(session, ids)
+                    session.ends_with_newline = False
+                    for _ in range(self.max_new_tokens):
+                        token = self._next_token(logits)
+                        # Fin de réponse : EOS (hors cache) ou retour à la ligne (dans le cache)
+                        if token == self.tokenizer.eos_token_id:
+                            break
+                        generated.append(token)
+                        text = self.tokenizer.decode(generated, skip_special_tokens=True)
+                        done = '\n' in text
+                        text = text.split('\n', 1)[0]
+                        # Le texte décodé peut se stabiliser après coup (caractères sur plusieurs tokens)
+                        if len(text) > len(reply) and text.startswith(reply):
+                            chunk = text[len(reply):]
+                            reply = text
+                            pending = token
+                            yield chunk
+                        pending = None
+                        logits = self._forward(session, [token])
+                        if done:
+                            session.ends_with_newline = True
+                            break
+                finally:
+                    # Générateur fermé pendant un yield : le cache suit quand même le texte affiché
+                    if pending is not None:
+                        self._forward(session, [pending])
+                        # done : le texte décodé jusqu'à ce token contient le retour à la ligne
+                        session.ends_with_newline = done
+                    session.history.append((message, reply.strip()))
+                    session.nbytes = cache_nbytes(session.cache)
+        finally:
+            # Aussi quand le générateur est fermé avant la fin de la réponse
+            self._evict()
+    
+    def reply(self, session_id, character, message):
+        """Réponse complète (sans streaming)"""
+        return ''.join(self.stream_reply(session_id, character, message)).strip()
+    
+    def stats(self):
+        """Sessions en mémoire et taille totale des caches KV (Mo)"""
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'cache_mb': sum(s.nbytes for s in self._sessions.values()) / 2**20,
+            }
+
+def main():
+    """Petite conversation en ligne de commande avec Nouba"""
+    config = load_config()
+    character = next(c for c in config['characters'] if c['name'] == 'Nouba')
+    
+    model_dir = get_model_dir(config)
+    if not model_dir.exists():
+        print(f"ERREUR - Modele introuvable : {model_dir}")
+        print("Execute d'abord : python scripts/training/fine_tune_llm.py")
+        return
+    
+    engine = ChatEngine.from_config(config)
+    print(f"{character['avatar']} {character['name']} : {character['greetings'][0]}")
+    print("(ligne vide pour quitter)\n")
+    while True:
+        message = input("Toi : ").strip()
+        if not message:
+            break
+        print(f"{character['avatar']} {character['name']} :", end='', flush=True)
+        for chunk in engine.stream_reply('cli', character, message):
+            print(chunk, end='', flush=True)
+        print()
+
+if __name__ == "__main__":
+    main()
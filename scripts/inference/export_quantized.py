@@ -0,0 +1,91 @@
+"""
+Export du modèle fine-tuné pour l'inférence CPU
+Fusionne l'adaptateur LoRA dans le modèle de base puis quantifie dynamiquement
+les couches linéaires en int8 (poids int8, activations quantifiées à la volée)
+Le dossier produit est chargé directement par InferenceEngine
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+import torch
+
+from inference_engine import (
+    load_config, get_model_dir, load_model, load_tokenizer, quantize_model, QUANTIZED_WEIGHTS
+)
+
+def get_quantized_dir(config):
+    """Dossier de l'export int8 (à côté du modèle final)"""
+    return get_model_dir(config).parent / "int8"
+
+def model_size_mb(model):
+    """
+    Taille des poids en mémoire, sans copie : paramètres, buffers et poids int8
+    empaquetés des couches quantifiées (ni paramètres ni buffers)
+    """
+    tensors = list(model.parameters()) + list(model.buffers())
+    for module in model.modules():
+        packed = getattr(module, '_packed_params', None)
+        if packed is not None and hasattr(packed, '_weight_bias'):
+            tensors.extend(tensor for tensor in packed._weight_bias() if tensor is not None)
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors) / 2**20
+
+def process_rss_mb():
+    """Mémoire résidente actuelle du processus (Mo), None hors Linux"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+def export_quantized(model_dir, output_dir):
+    """
+    Fusionne, quantifie et sauvegarde le modèle
+    
+    Returns:
+        (taille fp32 en Mo, taille int8 en Mo)
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    # La quantification dynamique se fait depuis des poids fp32, sur CPU
+    model = load_model(model_dir, 'cpu', torch.float32, merge=True)
+    fp32_size = model_size_mb(model)
+    
+    quantized = quantize_model(model)
+    torch.save(quantized.state_dict(), output_dir / QUANTIZED_WEIGHTS)
+    quantized.config.save_pretrained(str(output_dir))
+    load_tokenizer(model_dir).save_pretrained(str(output_dir))
+    
+    return fp32_size, (output_dir / QUANTIZED_WEIGHTS).stat().st_size / 2**20
+
+def main():
+    """Fonction principale"""
+    print("="*60)
+    print("Export int8 du modele fine-tune (inference CPU)")
+    print("="*60)
+    
+    config = load_config()
+    model_dir = get_model_dir(config)
+    if not model_dir.exists():
+        print(f"ERREUR - Modele introuvable : {model_dir}")
+        print("Execute d'abord : python scripts/training/fine_tune_llm.py")
+        return
+    
+    output_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else get_quantized_dir(config)
+    start = time.perf_counter()
+    fp32_size, int8_size = export_quantized(model_dir, output_dir)
+    
+    print(f"   fp32 : {fp32_size:.0f} Mo -> int8 : {int8_size:.0f} Mo "
+          f"(x{fp32_size / int8_size:.1f}) en {time.perf_counter() - start:.0f}s")
+    rss = process_rss_mb()
+    if rss is not None:
+        print(f"   Memoire residente du processus : {rss:.0f} Mo")
+    print(f"\nOK - Modele quantifie sauvegarde : {output_dir}")
+    print("Comparer avec : python scripts/benchmarks/bench_quantized_inference.py")
+
+if __name__ == "__main__":
+    main()
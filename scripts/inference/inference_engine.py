@@ -0,0 +1,270 @@
+"""
+Moteur d'inférence local pour le modèle fine-tuné (modèle de base + adaptateur LoRA)
+Le modèle est chargé une seule fois ; les requêtes concurrentes sont regroupées
+en micro-batchs (fenêtre de quelques millisecondes) et générées ensemble
+"""
+
+import json
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+import torch
+import yaml
+from accelerate import init_empty_weights
+from transformers import AutoConfig, AutoModelForCausalLM, AutoTokenizer
+
+BASE_DIR = Path(__file__).parent.parent.parent
+CONFIG_FILE = BASE_DIR / "config.yaml"
+MODELS_DIR = BASE_DIR / "models"
+sys.path.insert(0, str(BASE_DIR / "scripts" / "training"))
+
+from fine_tune_llm import format_prompt, resolve_device, resolve_precision, PRECISION_DTYPES
+
+# Requêtes maximum par micro-batch
+MAX_BATCH_SIZE = 16
+# Attente maximale pour compléter un micro-batch (millisecondes)
+BATCH_WINDOW_MS = 10
+# Tokens générés au maximum par réponse (les réponses sont des mots ou expressions)
+MAX_NEW_TOKENS = 32
+# Poids du modèle quantifié int8 (export_quantized.py)
+QUANTIZED_WEIGHTS = "model_int8.pt"
+
+def load_config():
+    """Charge la configuration"""
+    with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+def get_model_dir(config):
+    """Dossier du modèle final sauvegardé par fine_tune_llm.py"""
+    return MODELS_DIR / config['training']['output_dir'] / "final"
+
+def quantize_model(model):
+    """Quantification dynamique int8 des couches linéaires (inférence CPU)"""
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def empty_quantized_linears(model):
+    """
+    Remplace chaque nn.Linear par une couche int8 dynamique vide, comme quantize_model
+    (qui ne convertit que le type exact nn.Linear) mais sans lire les poids float
+    """
+    for name, module in list(model.named_modules()):
+        if type(module) is torch.nn.Linear:
+            parent_name, _, child_name = name.rpartition('.')
+            setattr(model.get_submodule(parent_name), child_name, torch.ao.nn.quantized.dynamic.Linear(
+                module.in_features, module.out_features, bias_=module.bias is not None, dtype=torch.qint8
+            ))
+    return model
+
+def load_quantized_model(model_dir):
+    """
+    Recharge un modèle exporté en int8 (CPU uniquement) : architecture recréée depuis
+    config.json sans allouer ni initialiser les poids float (init_empty_weights),
+    couches linéaires remplacées par des couches int8, puis poids exportés assignés
+    La mémoire utilisée reste celle du modèle int8
+    """
+    model_dir = Path(model_dir)
+    config = AutoConfig.from_pretrained(str(model_dir))
+    with init_empty_weights():
+        model = AutoModelForCausalLM.from_config(config, torch_dtype=torch.float32)
+    empty_quantized_linears(model)
+    state_dict = torch.load(model_dir / QUANTIZED_WEIGHTS, map_location='cpu')
+    model.load_state_dict(state_dict, assign=True)
+    return model.eval()
+
+def load_tokenizer(model_dir):
+    """
+    Tokenizer du modèle ; un checkpoint intermédiaire (checkpoint-N) n'en contient
+    pas : celui du modèle de base de l'adaptateur est alors utilisé
+    """
+    model_dir = Path(model_dir)
+    adapter_config = model_dir / "adapter_config.json"
+    if not (model_dir / "tokenizer_config.json").exists() and adapter_config.exists():
+        with open(adapter_config, 'r', encoding='utf-8') as f:
+            return AutoTokenizer.from_pretrained(json.load(f)['base_model_name_or_path'])
+    return AutoTokenizer.from_pretrained(str(model_dir))
+
+def load_model(model_dir, device, dtype, merge=True):
+    """
+    Charge le modèle fine-tuné
+    Si le dossier contient un adaptateur LoRA, le modèle de base est chargé puis
+    l'adaptateur appliqué ; merge=True fusionne les poids (inférence plus rapide)
+    Un dossier exporté en int8 est chargé quantifié, sur CPU
+    """
+    model_dir = Path(model_dir)
+    if (model_dir / QUANTIZED_WEIGHTS).exists():
+        return load_quantized_model(model_dir)
+    if (model_dir / "adapter_config.json").exists():
+        from peft import AutoPeftModelForCausalLM
+        model = AutoPeftModelForCausalLM.from_pretrained(str(model_dir), torch_dtype=dtype)
+        if merge:
+            model = model.merge_and_unload()
+    else:
+        model = AutoModelForCausalLM.from_pretrained(str(model_dir), torch_dtype=dtype)
+    return model.to(device).eval()
+
+def extract_answer(generated):
+    """Réponse du modèle : première ligne du texte généré après "Réponse:" """
+    return generated.strip().split('\n', 1)[0].strip()
+
+class InferenceEngine:
+    """
+    Traduction français -> Sara par le modèle fine-tuné
+    
+    translate_batch() traite une liste directement ; submit()/translate() passent par
+    un thread de service qui regroupe les requêtes arrivant dans la même fenêtre
+    (les questions identiques d'un même batch ne sont générées qu'une fois)
+    """
+    
+    def __init__(self, model_dir, device='cpu', precision='fp32', merge=True,
+                 max_batch_size=MAX_BATCH_SIZE, batch_window_ms=BATCH_WINDOW_MS,
+                 max_new_tokens=MAX_NEW_TOKENS):
+        if (Path(model_dir) / QUANTIZED_WEIGHTS).exists():
+            device = 'cpu'
+        self.device = device
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window_ms / 1000
+        self.max_new_tokens = max_new_tokens
+        
+        self.tokenizer = load_tokenizer(model_dir)
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        # Padding à gauche : toutes les questions se terminent au même indice
+        self.tokenizer.padding_side = 'left'
+        self.model = load_model(model_dir, device, PRECISION_DTYPES[precision], merge)
+        
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+    
+    @classmethod
+    def from_config(cls, config=None, **kwargs):
+        """Crée le moteur depuis config.yaml (périphérique et précision comme l'entraînement)"""
+        config = config or load_config()
+        device = resolve_device(config['model'])
+        precision = resolve_precision(config['training'], device)
+        return cls(get_model_dir(config), device=device, precision=precision, **kwargs)
+    
+    @torch.inference_mode()
+    def translate_batch(self, frenches):
+        """
+        Traduit une liste de mots/expressions français (décodage glouton)
+        
+        Returns:
+            Liste des réponses Sara, dans l'ordre
+        """
+        if not frenches:
+            return []
+        prompts = [format_prompt(french) for french in frenches]
+        inputs = self.tokenizer(prompts, return_tensors='pt', padding=True).to(self.device)
+        outputs = self.model.generate(
+            **inputs,
+            max_new_tokens=self.max_new_tokens,
+            do_sample=False,
+            pad_token_id=self.tokenizer.pad_token_id,
+        )
+        generated = outputs[:, inputs['input_ids'].shape[1]:]
+        return [extract_answer(text) for text in self.tokenizer.batch_decode(generated, skip_special_tokens=True)]
+    
+    def _start_worker(self):
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._serve, daemon=True)
+                self._worker.start()
+    
+    def _collect_batch(self):
+        """Attend une requête puis complète le batch pendant la fenêtre"""
+        batch = [self._queue.get()]
+        if batch[0] is None:
+            return None
+        deadline = time.perf_counter() + self.batch_window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+    
+    def _serve(self):
+        """Boucle du thread de service : un micro-batch par itération"""
+        while True:
+            batch = self._collect_batch()
+            if batch is None:
+                return
+            # Regrouper les requêtes identiques
+            waiting = {}
+            for french, future in batch:
+                waiting.setdefault(french, []).append(future)
+            try:
+                answers = self.translate_batch(list(waiting))
+            except Exception as e:
+                for futures in waiting.values():
+                    for future in futures:
+                        future.set_exception(e)
+                continue
+            for answer, futures in zip(answers, waiting.values()):
+                for future in futures:
+                    future.set_result(answer)
+            self.batches += 1
+            self.requests += len(batch)
+    
+    def submit(self, french):
+        """Soumet une traduction au micro-batching ; renvoie un Future"""
+        self._start_worker()
+        future = Future()
+        self._queue.put((french, future))
+        return future
+    
+    def translate(self, french, timeout=None):
+        """Traduit un mot français (bloquant, regroupé avec les requêtes concurrentes)"""
+        return self.submit(french).result(timeout)
+    
+    def close(self):
+        """Arrête le thread de service"""
+        with self._lock:
+            if self._worker is not None:
+                self._queue.put(None)
+                self._worker.join()
+                self._worker = None
+
+def main():
+    """Traduit les mots passés en argument"""
+    words = sys.argv[1:] or ["manger", "eau", "maison"]
+    
+    print("="*60)
+    print("Inference locale (modele fine-tune)")
+    print("="*60)
+    
+    config = load_config()
+    model_dir = get_model_dir(config)
+    if not model_dir.exists():
+        print(f"ERREUR - Modele introuvable : {model_dir}")
+        print("Execute d'abord : python scripts/training/fine_tune_llm.py")
+        return
+    
+    start = time.perf_counter()
+    engine = InferenceEngine.from_config(config)
+    print(f"   Modele charge en {time.perf_counter() - start:.1f}s ({engine.device})")
+    
+    start = time.perf_counter()
+    futures = [engine.submit(word) for word in words]
+    for word, future in zip(words, futures):
+        print(f"   {word} -> {future.result()}")
+    engine.close()
+    print(f"\n   {len(words)} requetes en {engine.batches} batch(s), "
+          f"{time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
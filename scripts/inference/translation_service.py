@@ -0,0 +1,268 @@
+"""
+Service de traduction français -> Sara : le lexique d'abord, le modèle ensuite
+1. Recherche exacte (clé normalisée) dans le lexique colonnaire : quelques µs
+2. Sinon, réponse du modèle fine-tuné, mise en cache (LRU en mémoire + SQLite sur disque)
+Le modèle n'est chargé qu'au premier mot absent du lexique
+"""
+
+import hashlib
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import yaml
+
+BASE_DIR = Path(__file__).parent.parent.parent
+CONFIG_FILE = BASE_DIR / "config.yaml"
+MODELS_DIR = BASE_DIR / "models"
+sys.path.insert(0, str(BASE_DIR / "scripts" / "data_processing"))
+
+from lexicon_store import LexiconStore, STORE_FILE, PROCESSED_DIR, UNKNOWN_DIALECT, french_key
+
+TRANSLATION_CACHE_FILE = PROCESSED_DIR / "translation_cache.sqlite"
+# Réponses du modèle gardées en mémoire
+MEMORY_CACHE_SIZE = 4096
+# Fichiers de poids qui identifient une version du modèle
+WEIGHT_SUFFIXES = ('.safetensors', '.bin', '.pt')
+
+SOURCE_LEXICON = 'lexicon'
+SOURCE_MEMORY = 'memory_cache'
+SOURCE_DISK = 'disk_cache'
+SOURCE_MODEL = 'model'
+SOURCES = (SOURCE_LEXICON, SOURCE_MEMORY, SOURCE_DISK, SOURCE_MODEL)
+
+def default_model_dir():
+    """Dossier du modèle final (comme inference_engine.get_model_dir, sans importer torch)"""
+    with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    return MODELS_DIR / config['training']['output_dir'] / "final"
+
+def weights_version(model_dir):
+    """
+    Identifiant des poids d'un modèle : nom, taille et date de modification de ses
+    fichiers de poids (adapter_model.safetensors, model_int8.pt...) ; un
+    réentraînement ou un nouvel export change l'identifiant
+    None si le dossier ne contient pas de poids
+    """
+    model_dir = Path(model_dir)
+    if not model_dir.is_dir():
+        return None
+    files = sorted(path for path in model_dir.iterdir() if path.suffix in WEIGHT_SUFFIXES)
+    if not files:
+        return None
+    digest = hashlib.sha256()
+    for path in files:
+        stat = path.stat()
+        digest.update(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def default_engine_factory():
+    """Charge le moteur d'inférence (import différé : torch n'est chargé qu'au besoin)"""
+    from inference_engine import InferenceEngine
+    return InferenceEngine.from_config()
+
+class TranslationService:
+    """
+    Traductions avec compteurs par source (appels, latence cumulée)
+    
+    Args:
+        store_path: Lexique colonnaire (lexicon_store.bin)
+        engine_factory: Fonction sans argument qui crée le moteur d'inférence,
+            ou None pour n'utiliser que le lexique ; elle est ignorée si model_dir
+            ne contient pas de poids, ou abandonnée si elle échoue au premier appel
+        cache_path: Base SQLite des réponses du modèle, ou None (mémoire seulement)
+        model_version: Identifiant du modèle, inclus dans la clé du cache disque
+            (un nouveau modèle n'hérite pas des réponses de l'ancien) ; None pour
+            le calculer depuis les fichiers de poids de model_dir (weights_version)
+        model_dir: Dossier du modèle servi par engine_factory (défaut : modèle final
+            de config.yaml)
+    """
+    
+    def __init__(self, store_path=STORE_FILE, engine_factory=default_engine_factory,
+                 cache_path=TRANSLATION_CACHE_FILE, model_version=None, model_dir=None,
+                 memory_cache_size=MEMORY_CACHE_SIZE):
+        self.store = LexiconStore(store_path)
+        self.engine_factory = engine_factory
+        self.engine = None
+        if model_version is None and engine_factory is not None:
+            model_version = weights_version(model_dir or default_model_dir())
+            if model_version is None:
+                # Pas de poids (modèle pas encore entraîné) : lexique seul
+                self.engine_factory = None
+        self.model_version = model_version or 'none'
+        self.memory_cache_size = memory_cache_size
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        # Verrou propre au chargement du modèle (long) : les compteurs et les
+        # caches restent accessibles aux autres threads pendant ce temps
+        self._engine_lock = threading.Lock()
+        self.counts = dict.fromkeys(SOURCES + ('miss',), 0)
+        self.latency = dict.fromkeys(SOURCES + ('miss',), 0.0)
+        
+        self._db = None
+        if cache_path is not None:
+            Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(cache_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "model TEXT NOT NULL, key TEXT NOT NULL, answer TEXT NOT NULL, "
+                "PRIMARY KEY (model, key))"
+            )
+            self._db.commit()
+    
+    def close(self):
+        """Libère le lexique, la base de cache et le moteur"""
+        self.store.close()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        if self.engine is not None:
+            self.engine.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def _record(self, source, start):
+        with self._lock:
+            self.counts[source] += 1
+            self.latency[source] += time.perf_counter() - start
+    
+    def _memory_get(self, key):
+        with self._lock:
+            answer = self._memory.get(key)
+            if answer is not None:
+                self._memory.move_to_end(key)
+            return answer
+    
+    def _memory_put(self, key, answer):
+        with self._lock:
+            self._memory[key] = answer
+            self._memory.move_to_end(key)
+            if len(self._memory) > self.memory_cache_size:
+                self._memory.popitem(last=False)
+    
+    def _disk_get(self, key):
+        if self._db is None:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT answer FROM translations WHERE model = ? AND key = ?",
+                (self.model_version, key)
+            ).fetchone()
+        return row[0] if row else None
+    
+    def _disk_put(self, key, answer):
+        if self._db is None:
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO translations (model, key, answer) VALUES (?, ?, ?)",
+                (self.model_version, key, answer)
+            )
+            self._db.commit()
+    
+    def _model_answer(self, french):
+        """Réponse du modèle, ou None s'il ne peut pas être chargé (l'échec est retenu)"""
+        if self.engine is None:
+            with self._engine_lock:
+                if self.engine is None and self.engine_factory is not None:
+                    try:
+                        self.engine = self.engine_factory()
+                    except (OSError, ImportError, ValueError) as e:
+                        print(f"ATTENTION - Modele indisponible, lexique seul : {e}")
+                        self.engine_factory = None
+            if self.engine is None:
+                return None
+        return self.engine.translate(french)
+    
+    def translate(self, french, dialect=None):
+        """
+        Traduit un mot ou une expression française
+        
+        Args:
+            french: Texte français
+            dialect: Code dialecte du lexique (ex: 'Ngb') ou None pour tous ; si le mot
+                est dans le lexique mais pas dans ce dialecte, toutes ses formes sont renvoyées
+        
+        Returns:
+            (source, liste de (code dialecte, forme)) ; source vaut None si
+            le mot est absent du lexique et qu'aucun modèle n'est disponible
+        """
+        start = time.perf_counter()
+        key = french_key(french)
+        if not key:
+            return None, []
+        
+        french_id = self.store.find(key)
+        if french_id is not None:
+            # Mot connu sans forme dans ce dialecte : les formes des autres
+            # dialectes du lexique valent mieux qu'une réponse du modèle
+            forms = self.store.forms_at(french_id, dialect) or self.store.forms_at(french_id)
+            self._record(SOURCE_LEXICON, start)
+            return SOURCE_LEXICON, forms
+        
+        # Le modèle ne distingue pas les dialectes : sa réponse est sans code
+        answer = self._memory_get(key)
+        if answer is not None:
+            self._record(SOURCE_MEMORY, start)
+            return SOURCE_MEMORY, [(UNKNOWN_DIALECT, answer)]
+        
+        answer = self._disk_get(key)
+        if answer is not None:
+            self._memory_put(key, answer)
+            self._record(SOURCE_DISK, start)
+            return SOURCE_DISK, [(UNKNOWN_DIALECT, answer)]
+        
+        answer = self._model_answer(french.strip()) if self.engine_factory is not None else None
+        if answer is None:
+            self._record('miss', start)
+            return None, []
+        
+        self._memory_put(key, answer)
+        self._disk_put(key, answer)
+        self._record(SOURCE_MODEL, start)
+        return SOURCE_MODEL, [(UNKNOWN_DIALECT, answer)]
+    
+    def stats(self):
+        """Taux de réponses et latence moyenne (ms) par source"""
+        with self._lock:
+            total = sum(self.counts.values())
+            return {
+                source: {
+                    'count': count,
+                    'rate': count / total if total else 0.0,
+                    'avg_ms': self.latency[source] * 1000 / count if count else 0.0,
+                }
+                for source, count in self.counts.items()
+            }
+
+def main():
+    """Traduit les mots passés en argument et affiche les compteurs"""
+    words = sys.argv[1:] or ["manger", "eau", "maison", "manger"]
+    
+    print("="*60)
+    print("Service de traduction (lexique puis modele)")
+    print("="*60)
+    
+    if not STORE_FILE.exists():
+        print(f"ERREUR - Fichier introuvable : {STORE_FILE}")
+        print("Execute d'abord : python scripts/data_processing/lexicon_store.py")
+        return
+    
+    with TranslationService() as service:
+        for word in words:
+            source, forms = service.translate(word)
+            print(f"   {word} -> {', '.join(form for _, form in forms) or '?'} ({source})")
+        
+        print()
+        for source, stat in service.stats().items():
+            print(f"   {source} : {stat['count']} ({stat['rate']:.0%}), {stat['avg_ms']:.2f} ms en moyenne")
+
+if __name__ == "__main__":
+    main()
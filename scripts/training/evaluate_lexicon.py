@@ -0,0 +1,132 @@
+"""
+Évaluation du modèle fine-tuné sur les entrées du lexique réservées à l'évaluation
+Décodage glouton par batchs, réparti sur plusieurs processus CPU ; une réponse est
+exacte si elle égale une des sara_variants (tons et accents ignorés)
+Écrit un rapport par entrée (JSON Lines) pour comparer les checkpoints
+Usage: python scripts/training/evaluate_lexicon.py [dossier_du_modele] [nombre_de_processus]
+"""
+
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import torch
+
+BASE_DIR = Path(__file__).parent.parent.parent
+DATA_DIR = BASE_DIR / "data" / "training"
+sys.path.insert(0, str(BASE_DIR / "scripts" / "inference"))
+sys.path.insert(0, str(BASE_DIR / "scripts" / "data_processing"))
+
+from fuzzy_index import normalize_for_search
+from dataset_split import split_entries
+from inference_engine import InferenceEngine, load_config, get_model_dir
+
+BATCH_SIZE = 16
+# Processus d'évaluation (chacun charge le modèle : la mémoire est le facteur limitant)
+NUM_WORKERS = min(4, os.cpu_count() or 1)
+# Entrées par tâche envoyée à un processus
+ENTRIES_PER_TASK = 64
+
+# Moteur d'inférence du processus (chargé une fois par l'initialiseur)
+_engine = None
+
+def held_out_entries(entries, limit=None):
+    """Entrées d'évaluation : la partie eval du découpage de l'entraînement (dataset_split)"""
+    _, evaluation = split_entries(entries)
+    selected = [entry for entry in evaluation if entry.get('sara_variants')]
+    return selected[:limit] if limit else selected
+
+def is_exact_match(answer, sara_variants):
+    """Réponse correcte si elle égale une des variantes (tons et accents ignorés)"""
+    answer = normalize_for_search(answer)
+    return bool(answer) and any(answer == normalize_for_search(v) for v in sara_variants)
+
+def _init_worker(model_dir, num_threads):
+    """Charge le modèle dans le processus, sans dépasser sa part des coeurs"""
+    global _engine
+    torch.set_num_threads(num_threads)
+    _engine = InferenceEngine(model_dir, device='cpu', precision='fp32', merge=True)
+
+def _evaluate_chunk(entries):
+    """Traduit et note un morceau d'entrées (exécuté dans un processus)"""
+    results = []
+    for i in range(0, len(entries), BATCH_SIZE):
+        batch = entries[i:i + BATCH_SIZE]
+        answers = _engine.translate_batch([entry['french'] for entry in batch])
+        for entry, answer in zip(batch, answers):
+            results.append({
+                'french': entry['french'],
+                'expected': entry['sara_variants'],
+                'answer': answer,
+                'exact': is_exact_match(answer, entry['sara_variants']),
+            })
+    return results
+
+def evaluate_model(model_dir, entries, workers=NUM_WORKERS):
+    """
+    Évalue un modèle (dossier final, checkpoint-N ou export int8)
+    
+    Returns:
+        Liste de résultats par entrée, dans l'ordre des entrées
+    """
+    chunks = [entries[i:i + ENTRIES_PER_TASK] for i in range(0, len(entries), ENTRIES_PER_TASK)]
+    workers = max(1, min(workers, len(chunks)))
+    num_threads = max(1, (os.cpu_count() or 1) // workers)
+    if workers == 1:
+        _init_worker(str(model_dir), num_threads)
+        chunk_results = map(_evaluate_chunk, chunks)
+        return [result for results in chunk_results for result in results]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(str(model_dir), num_threads)) as executor:
+        return [result for results in executor.map(_evaluate_chunk, chunks) for result in results]
+
+def write_report(results, report_path):
+    """Rapport JSON Lines : une ligne par entrée"""
+    report_path = Path(report_path)
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+def main():
+    """Fonction principale"""
+    config = load_config()
+    model_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else get_model_dir(config)
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else NUM_WORKERS
+    
+    print("="*60)
+    print(f"Evaluation sur le lexique : {model_dir.name}")
+    print("="*60)
+    
+    if not model_dir.exists():
+        print(f"ERREUR - Modele introuvable : {model_dir}")
+        print("Execute d'abord : python scripts/training/fine_tune_llm.py")
+        return
+    
+    data_file = DATA_DIR / "training_data_cleaned.json"
+    if not data_file.exists():
+        print(f"ERREUR - Fichier introuvable : {data_file}")
+        print("Execute d'abord : python scripts/data_processing/clean_and_normalize.py")
+        return
+    
+    with open(data_file, 'r', encoding='utf-8') as f:
+        entries = held_out_entries(json.load(f))
+    print(f"   {len(entries)} entrees d'evaluation, {workers} processus, batchs de {BATCH_SIZE}")
+    
+    start = time.perf_counter()
+    results = evaluate_model(model_dir, entries, workers)
+    elapsed = time.perf_counter() - start
+    
+    correct = sum(result['exact'] for result in results)
+    report_path = model_dir.parent / "eval" / f"{model_dir.name}.jsonl"
+    write_report(results, report_path)
+    
+    print(f"\n   Exactitude : {correct}/{len(results)} ({correct / max(len(results), 1):.1%})")
+    print(f"   {len(results) / elapsed:.1f} entrees/s ({elapsed:.0f}s)")
+    print(f"\nOK - Rapport par entree : {report_path}")
+
+if __name__ == "__main__":
+    main()
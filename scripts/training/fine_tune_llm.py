@@ -3,25 +3,149 @@ Script pour fine-tuner un modèle LLM avec les données Tchad Langues
 Utilise LoRA (Low-Rank Adaptation) pour un entraînement efficace
 """
 
+import hashlib
 import json
+import os
+import shutil
+import sys
+import time
 import yaml
 from pathlib import Path
+import transformers
 from transformers import (
     AutoModelForCausalLM,
     AutoTokenizer,
     TrainingArguments,
     Trainer,
-    DataCollatorForLanguageModeling
+    TrainerCallback,
+    DataCollatorForLanguageModeling,
+    default_data_collator
 )
+from transformers.trainer_utils import PREFIX_CHECKPOINT_DIR
 from peft import LoraConfig, get_peft_model, prepare_model_for_kbit_training
-from datasets import Dataset
+from datasets import Dataset, load_from_disk
 import torch
 from tqdm import tqdm
 
+try:
+    import resource  # Unix uniquement (pic de mémoire résidente)
+except ImportError:
+    resource = None
+
 BASE_DIR = Path(__file__).parent.parent.parent
 DATA_DIR = BASE_DIR / "data" / "training"
 CONFIG_FILE = BASE_DIR / "config.yaml"
 MODELS_DIR = BASE_DIR / "models"
+sys.path.insert(0, str(BASE_DIR / "scripts" / "data_processing"))
+
+from dataset_split import split_entries, SPLIT_TRAIN, SPLIT_EVAL, SPLIT_VERSION
+# Datasets tokenisés (Arrow, chargés par memory mapping)
+TOKENIZED_CACHE_DIR = DATA_DIR / "tokenized_cache"
+# À incrémenter si format_training_text ou la tokenisation changent
+TOKENIZED_FORMAT_VERSION = 2
+
+# Les séquences d'un batch sont complétées à un multiple de cette taille
+PAD_TO_MULTIPLE_OF = 8
+# Label ignoré par la loss (padding)
+IGNORE_INDEX = -100
+# Dossier de la dernière sauvegarde légère des poids LoRA
+ADAPTER_SNAPSHOT_DIR = "adapter_latest"
+# Métriques par pas (JSON Lines), à côté des checkpoints
+METRICS_FILE = "metrics.jsonl"
+# Signature de l'entraînement, écrite dans chaque checkpoint-N
+RUN_SIGNATURE_FILE = "run_signature.json"
+# Checkpoints d'un autre entraînement, mis de côté (hors rotation du Trainer)
+STALE_CHECKPOINTS_DIR = "stale_checkpoints"
+# Drapeaux CPU (Linux) des instructions bf16 natives (Cooper Lake, Sapphire Rapids, Zen 4...)
+CPUINFO_FILE = Path("/proc/cpuinfo")
+CPU_BF16_FLAGS = {'avx512_bf16', 'amx_bf16'}
+
+class TokenStats:
+    """Compte les tokens réels et les tokens de padding pour le rapport de fin"""
+    
+    def __init__(self):
+        self.real_tokens = 0
+        self.total_tokens = 0
+    
+    def count(self, batch):
+        self.real_tokens += int(batch['attention_mask'].sum())
+        self.total_tokens += batch['attention_mask'].numel()
+    
+    @property
+    def padding_ratio(self):
+        return 1 - self.real_tokens / self.total_tokens if self.total_tokens else 0.0
+
+class DataWaitTimer:
+    """
+    Temps passé à récupérer les batchs d'entraînement depuis le dernier reset()
+    first_fetch : début de la première récupération de la période (None si aucune)
+    """
+    
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        self.seconds = 0.0
+        self.batches = 0
+        self.first_fetch = None
+    
+    def add(self, start, end, batches=1):
+        if self.first_fetch is None:
+            self.first_fetch = start
+        self.seconds += end - start
+        self.batches += batches
+
+def block_diagonal_mask(position_ids, dtype):
+    """
+    Masque d'attention 4D (batch, 1, L, L) de séquences empaquetées : causal à
+    l'intérieur de chaque exemple, aucun token ne voit un autre exemple
+    Les exemples sont délimités par les position_ids qui repartent de 0 (pack_sequences)
+    Format additif attendu par transformers pour un masque 4D : 0 = visible,
+    minimum du dtype = masqué
+    """
+    segments = (position_ids == 0).cumsum(dim=-1)
+    length = position_ids.shape[-1]
+    causal = torch.ones(length, length, dtype=torch.bool, device=position_ids.device).tril()
+    visible = (segments[:, :, None] == segments[:, None, :]) & causal
+    mask = torch.zeros(visible.shape, dtype=dtype, device=position_ids.device)
+    mask.masked_fill_(~visible, torch.finfo(dtype).min)
+    return mask[:, None]
+
+class StatsTrainer(Trainer):
+    """
+    Trainer qui compte les tokens des seuls batchs d'entraînement (le collator
+    sert aussi à l'évaluation : il ne peut pas les distinguer) et chronomètre
+    leur récupération dans get_batch_samples : chargement et collate des micro-batchs
+    du pas (tous ceux de l'accumulation de gradient), ou attente des workers du
+    dataloader ; le Trainer l'appelle aussi sur le dataloader qui saute les batchs
+    déjà vus à la reprise d'une époque
+    packing=True remplace le masque 2D des séquences empaquetées par un masque
+    bloc-diagonal (block_diagonal_mask), en entraînement comme en évaluation
+    """
+    
+    def __init__(self, *args, token_stats=None, data_timer=None, packing=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.token_stats = token_stats
+        self.data_timer = data_timer
+        self.packing = packing
+    
+    def _prepare_inputs(self, inputs):
+        inputs = super()._prepare_inputs(inputs)
+        if self.packing and 'position_ids' in inputs:
+            inputs['attention_mask'] = block_diagonal_mask(inputs['position_ids'], self.model.dtype)
+        return inputs
+    
+    def get_batch_samples(self, epoch_iterator, num_batches, *args, **kwargs):
+        start = time.perf_counter()
+        batch_samples, num_items_in_batch = super().get_batch_samples(epoch_iterator, num_batches, *args, **kwargs)
+        if self.data_timer is not None:
+            self.data_timer.add(start, time.perf_counter(), len(batch_samples))
+        return batch_samples, num_items_in_batch
+    
+    def training_step(self, model, inputs, *args, **kwargs):
+        if self.token_stats is not None:
+            self.token_stats.count(inputs)
+        return super().training_step(model, inputs, *args, **kwargs)
 
 def load_config():
     """Charge la configuration"""
@@ -40,6 +164,13 @@ def load_training_data():
     with open(data_file, 'r', encoding='utf-8') as f:
         return json.load(f)
 
+def format_prompt(french):
+    """
+    Question posée au modèle (partagée par l'entraînement et l'inférence)
+    Le modèle complète la réponse après "Réponse:"
+    """
+    return f"Question: Comment dit-on '{french}' en Sara ?\nRéponse:"
+
 def format_training_text(entry):
     """
     Formate une entrée pour l'entraînement
@@ -55,7 +186,7 @@ def format_training_text(entry):
     sara = sara_variants[0].strip()
     
     # Format conversationnel simple
-    text = f"Question: Comment dit-on '{french}' en Sara ?\nRéponse: {sara}"
+    text = f"{format_prompt(french)} {sara}"
     
     return text
 
@@ -71,15 +202,15 @@ def prepare_dataset(entries, tokenizer, max_length=512):
     
     print(f"   {len(texts)} exemples prepares")
     
-    # Tokeniser
+    # Tokeniser sans padding : le collator complète chaque batch à sa plus longue séquence
     def tokenize_function(examples):
-        return tokenizer(
+        tokenized = tokenizer(
             examples['text'],
             truncation=True,
-            padding='max_length',
-            max_length=max_length,
-            return_tensors='pt'
+            max_length=max_length
         )
+        tokenized['length'] = [len(ids) for ids in tokenized['input_ids']]
+        return tokenized
     
     # Créer le dataset
     dataset = Dataset.from_dict({'text': texts})
@@ -89,8 +220,406 @@ def prepare_dataset(entries, tokenizer, max_length=512):
         remove_columns=['text']
     )
     
+    lengths = tokenized['length']
+    print(f"   Longueur moyenne : {sum(lengths) / max(len(lengths), 1):.1f} tokens (max {max(lengths, default=0)})")
+    
     return tokenized
 
+class AdapterSnapshotCallback(TrainerCallback):
+    """
+    Sauvegarde légère et fréquente : uniquement les poids de l'adaptateur LoRA
+    (quelques Mo, quelques millisecondes), en plus des checkpoints complets
+    du Trainer (optimizer, scheduler, position du dataloader) tous les save_steps
+    """
+    
+    def __init__(self, output_dir, every_steps):
+        self.snapshot_dir = Path(output_dir) / ADAPTER_SNAPSHOT_DIR
+        self.every_steps = every_steps
+    
+    def on_step_end(self, args, state, control, model=None, **kwargs):
+        if not self.every_steps or state.global_step % self.every_steps or not state.is_world_process_zero:
+            return
+        # Écriture dans un dossier temporaire, puis l'ancien snapshot est mis de côté
+        # (.old) avant de renommer le nouveau : un snapshot complet existe toujours
+        tmp_dir = self.snapshot_dir.with_name(self.snapshot_dir.name + ".tmp")
+        old_dir = self.snapshot_dir.with_name(self.snapshot_dir.name + ".old")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        model.save_pretrained(str(tmp_dir))
+        with open(tmp_dir / "snapshot_state.json", 'w', encoding='utf-8') as f:
+            json.dump({'global_step': state.global_step, 'epoch': state.epoch}, f)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if self.snapshot_dir.exists():
+            os.replace(self.snapshot_dir, old_dir)
+        os.replace(tmp_dir, self.snapshot_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+class RunSignatureCallback(TrainerCallback):
+    """Écrit la signature de l'entraînement dans chaque checkpoint complet"""
+    
+    def __init__(self, run_signature):
+        self.run_signature = run_signature
+    
+    def on_save(self, args, state, control, **kwargs):
+        if not state.is_world_process_zero:
+            return
+        checkpoint_dir = Path(args.output_dir) / f"{PREFIX_CHECKPOINT_DIR}-{state.global_step}"
+        if checkpoint_dir.is_dir():
+            with open(checkpoint_dir / RUN_SIGNATURE_FILE, 'w', encoding='utf-8') as f:
+                json.dump(self.run_signature, f, indent=2)
+
+class ThroughputMetricsCallback(TrainerCallback):
+    """
+    Mesure chaque pas d'optimisation et l'écrit dans metrics.jsonl
+    Un pas va de la récupération de ses batchs (DataWaitTimer) à
+    on_step_end : l'évaluation, les sauvegardes, les logs et les callbacks placés
+    après celui-ci (snapshot de l'adaptateur) tombent entre deux pas et sont exclus
+    - data_wait_s : temps de récupération des batchs (tous les micro-batchs du pas)
+    - compute_s : le reste du pas (forward/backward/optimizer)
+    - tokens_per_s : tokens utiles du pas (TokenStats, batchs d'entraînement) / durée du pas
+    - peak_rss_mb : pic de mémoire résidente du processus (et du GPU si présent)
+    """
+    
+    def __init__(self, output_dir, token_stats, data_timer):
+        self.metrics_path = Path(output_dir) / METRICS_FILE
+        self.token_stats = token_stats
+        self.data_timer = data_timer
+        self._file = None
+        self._tokens = 0
+        self.total_wait = 0.0
+        self.total_compute = 0.0
+    
+    def on_train_begin(self, args, state, control, **kwargs):
+        if state.is_world_process_zero:
+            self._file = open(self.metrics_path, 'a', encoding='utf-8')
+        self.data_timer.reset()
+        self._tokens = self.token_stats.real_tokens
+    
+    def on_step_end(self, args, state, control, **kwargs):
+        now = time.perf_counter()
+        first_fetch = self.data_timer.first_fetch
+        wait = self.data_timer.seconds
+        self.data_timer.reset()
+        tokens = self.token_stats.real_tokens - self._tokens
+        self._tokens = self.token_stats.real_tokens
+        if first_fetch is None:
+            return
+        step_s = now - first_fetch
+        compute = step_s - wait
+        self.total_wait += wait
+        self.total_compute += compute
+        
+        if self._file is None:
+            return
+        # ru_maxrss est en Ko sous Linux
+        record = {
+            'step': state.global_step,
+            'time': time.time(),
+            'step_s': round(step_s, 6),
+            'data_wait_s': round(wait, 6),
+            'compute_s': round(compute, 6),
+            'tokens': tokens,
+            'tokens_per_s': round(tokens / step_s, 1) if step_s > 0 else None,
+        }
+        if resource is not None:
+            record['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        if torch.cuda.is_available():
+            record['peak_gpu_mb'] = round(torch.cuda.max_memory_allocated() / 2**20, 1)
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+    
+    def on_train_end(self, args, state, control, **kwargs):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        total = self.total_wait + self.total_compute
+        if total > 0:
+            print(f"   Attente des donnees : {self.total_wait / total:.1%} du temps des pas "
+                  f"(calcul : {self.total_compute / total:.1%})")
+
+def build_run_signature(base_model, data_hash, packing, max_length):
+    """
+    Ce qui doit être identique pour reprendre un entraînement : modèle de base,
+    données (hash), découpage train/eval, packing, max_length et format des exemples
+    """
+    return {
+        'base_model': base_model,
+        'data': data_hash,
+        'split_version': SPLIT_VERSION,
+        'packing': packing,
+        'max_length': max_length,
+        'format': TOKENIZED_FORMAT_VERSION,
+    }
+
+def read_run_signature(checkpoint_dir):
+    """Signature enregistrée dans un checkpoint, ou None"""
+    path = Path(checkpoint_dir) / RUN_SIGNATURE_FILE
+    if not path.exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def find_resume_checkpoint(output_dir, run_signature):
+    """
+    Dernier checkpoint complet (checkpoint-N) dont la signature est celle de
+    l'entraînement en cours, ou None
+    Les checkpoints plus récents d'un autre entraînement (autres données, autre
+    modèle, sans signature...) sont déplacés dans stale_checkpoints/ : le Trainer
+    ne les écrasera ni ne les mélangera aux nouveaux ; un checkpoint de même nom
+    déjà mis de côté est conservé (suffixe .1, .2...)
+    """
+    output_dir = Path(output_dir)
+    if not output_dir.is_dir():
+        return None
+    checkpoints = [
+        path for path in output_dir.glob(f"{PREFIX_CHECKPOINT_DIR}-*")
+        if path.is_dir() and path.name.rsplit('-', 1)[-1].isdigit()
+    ]
+    for checkpoint in sorted(checkpoints, key=lambda path: int(path.name.rsplit('-', 1)[-1]), reverse=True):
+        if read_run_signature(checkpoint) == run_signature:
+            return str(checkpoint)
+        stale_dir = output_dir / STALE_CHECKPOINTS_DIR
+        stale_dir.mkdir(exist_ok=True)
+        target = stale_dir / checkpoint.name
+        suffix = 0
+        while target.exists():
+            suffix += 1
+            target = stale_dir / f"{checkpoint.name}.{suffix}"
+        os.replace(checkpoint, target)
+        print(f"   {checkpoint.name} d'un autre entrainement : deplace dans {STALE_CHECKPOINTS_DIR}/{target.name}")
+    return None
+
+def pack_sequences(token_lists, max_length, eos_token_id, pad_token_id):
+    """
+    Empaquette des exemples tokenisés dans des séquences de max_length tokens
+    Chaque exemple est suivi d'un EOS ; un exemple n'est jamais coupé entre deux
+    séquences (s'il ne rentre pas, la séquence est complétée et une nouvelle commence)
+    
+    Les position_ids repartent de 0 à chaque exemple (et au début du padding) :
+    chacun est encodé comme s'il était seul. StatsTrainer(packing=True) en déduit
+    un masque bloc-diagonal : un exemple ne voit pas ceux qui le précèdent
+    
+    Returns:
+        Dictionnaire de colonnes {'input_ids', 'attention_mask', 'labels', 'position_ids'}
+    """
+    packed = {'input_ids': [], 'attention_mask': [], 'labels': [], 'position_ids': []}
+    
+    def flush(ids, positions):
+        padding = max_length - len(ids)
+        packed['input_ids'].append(ids + [pad_token_id] * padding)
+        packed['attention_mask'].append([1] * len(ids) + [0] * padding)
+        # Le padding est exclu de la loss, pas les EOS (même si pad_token == eos_token)
+        packed['labels'].append(ids + [IGNORE_INDEX] * padding)
+        packed['position_ids'].append(positions + list(range(padding)))
+    
+    current = []
+    positions = []
+    for ids in token_lists:
+        ids = list(ids[:max_length - 1]) + [eos_token_id]
+        if current and len(current) + len(ids) > max_length:
+            flush(current, positions)
+            current = []
+            positions = []
+        current.extend(ids)
+        positions.extend(range(len(ids)))
+    if current:
+        flush(current, positions)
+    
+    return packed
+
+def prepare_packed_dataset(entries, tokenizer, max_length=512):
+    """
+    Prépare un dataset empaqueté : plusieurs paires du lexique par séquence
+    (mode packing, pour les exemples courts)
+    """
+    print("Preparation du dataset (packing)...")
+    
+    texts = []
+    for entry in tqdm(entries, desc="Formatage"):
+        text = format_training_text(entry)
+        if text:
+            texts.append(text)
+    
+    token_lists = tokenizer(texts, truncation=True, max_length=max_length)['input_ids']
+    packed = pack_sequences(token_lists, max_length, tokenizer.eos_token_id, tokenizer.pad_token_id)
+    
+    n_sequences = len(packed['input_ids'])
+    print(f"   {len(texts)} exemples empaquetes en {n_sequences} sequences de {max_length} tokens "
+          f"({len(texts) / max(n_sequences, 1):.1f} exemples par sequence)")
+    
+    return Dataset.from_dict(packed)
+
+def resolve_device(model_config):
+    """
+    Périphérique d'entraînement : 'cuda' si disponible, sinon 'cpu'
+    model.device = "cpu" force le mode CPU même si un GPU est présent
+    """
+    requested = model_config.get('device', 'auto')
+    if requested == 'cpu' or not torch.cuda.is_available():
+        return 'cpu'
+    return 'cuda'
+
+def cpu_supports_bf16():
+    """
+    bf16 n'est rapide sur CPU qu'avec des instructions bf16 natives (AVX512_BF16, AMX) :
+    avec AVX-512 seul (Skylake-X, Cascade Lake), il est émulé et plus lent que fp32
+    Drapeaux lus dans /proc/cpuinfo ; False hors Linux (fp32 par prudence)
+    """
+    try:
+        with open(CPUINFO_FILE, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('flags'):
+                    return not CPU_BF16_FLAGS.isdisjoint(line.split(':', 1)[1].split())
+    except OSError:
+        pass
+    return False
+
+def resolve_precision(training_config, device):
+    """
+    Précision d'entraînement : 'bf16', 'fp16' ou 'fp32'
+    training.precision = "auto" choisit bf16 si le matériel le supporte,
+    sinon fp16 sur GPU et fp32 sur CPU (fp16 n'est pas utilisable sur CPU)
+    """
+    precision = training_config.get('precision', 'auto')
+    if precision != 'auto':
+        if device == 'cpu' and precision == 'fp16':
+            print("   fp16 non supporte sur CPU : fp32 utilise")
+            return 'fp32'
+        return precision
+    if device == 'cuda':
+        return 'bf16' if torch.cuda.is_bf16_supported() else 'fp16'
+    return 'bf16' if cpu_supports_bf16() else 'fp32'
+
+PRECISION_DTYPES = {'bf16': torch.bfloat16, 'fp16': torch.float16, 'fp32': torch.float32}
+
+def load_model(base_model, model_config, device, precision):
+    """
+    Charge le modèle de base
+    La quantization 4-bit (bitsandbytes) demande un GPU : sur CPU, le modèle est
+    chargé en pleine précision (ou bf16) sans device_map
+    """
+    dtype = PRECISION_DTYPES[precision]
+    use_quantization = model_config.get('use_quantization', False)
+    
+    if use_quantization and device == 'cpu':
+        print("   Quantization 4-bit indisponible sur CPU : chargement sans quantization")
+        use_quantization = False
+    
+    if use_quantization:
+        print("   Utilisation de la quantization 4-bit...")
+        from transformers import BitsAndBytesConfig
+        
+        bnb_config = BitsAndBytesConfig(
+            load_in_4bit=True,
+            bnb_4bit_use_double_quant=True,
+            bnb_4bit_quant_type="nf4",
+            bnb_4bit_compute_dtype=dtype if dtype != torch.float32 else torch.float16
+        )
+        
+        model = AutoModelForCausalLM.from_pretrained(
+            base_model,
+            quantization_config=bnb_config,
+            device_map="auto",
+            trust_remote_code=True
+        )
+    elif device == 'cuda':
+        model = AutoModelForCausalLM.from_pretrained(
+            base_model,
+            torch_dtype=dtype,
+            device_map="auto",
+            trust_remote_code=True
+        )
+    else:
+        model = AutoModelForCausalLM.from_pretrained(
+            base_model,
+            torch_dtype=dtype,
+            trust_remote_code=True
+        )
+    
+    return model, use_quantization
+
+def build_training_arguments(training_config, output_dir, device, precision, packing=False):
+    """TrainingArguments selon la configuration, le périphérique et la précision"""
+    return TrainingArguments(
+        output_dir=str(output_dir),
+        num_train_epochs=training_config.get('num_train_epochs', 3),
+        per_device_train_batch_size=training_config.get('per_device_train_batch_size', 2),
+        gradient_accumulation_steps=training_config.get('gradient_accumulation_steps', 4),
+        learning_rate=training_config.get('learning_rate', 2e-4),
+        warmup_steps=training_config.get('warmup_steps', 100),
+        logging_steps=training_config.get('logging_steps', 100),
+        save_steps=training_config.get('save_steps', 500),
+        eval_steps=training_config.get('eval_steps', 500),
+        eval_strategy="steps",
+        save_total_limit=3,
+        load_best_model_at_end=True,
+        fp16=precision == 'fp16',
+        bf16=precision == 'bf16',
+        use_cpu=device == 'cpu',
+        gradient_checkpointing=training_config.get('gradient_checkpointing', False),
+        # Batches de longueurs proches : peu de padding avec le padding dynamique
+        group_by_length=training_config.get('group_by_length', True) and not packing,
+        length_column_name='length',
+        report_to="none"
+    )
+
+def hash_file(path, chunk_size=1 << 20):
+    """Calcule le SHA-256 d'un fichier sans le charger entièrement"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def get_tokenized_cache_path(tokenizer, max_length, packing, split=SPLIT_TRAIN, data_hash=None):
+    """
+    Chemin du cache du dataset tokenisé
+    La clé combine le hash des données nettoyées, le tokenizer (nom, taille du
+    vocabulaire, version de transformers), max_length, le mode (packing ou non)
+    et la partie du découpage (train/eval) : changer l'un d'eux invalide le cache
+    """
+    key = json.dumps({
+        'split': split,
+        'split_version': SPLIT_VERSION,
+        'data': data_hash or hash_file(DATA_DIR / "training_data_cleaned.json"),
+        'tokenizer': tokenizer.name_or_path,
+        'vocab_size': len(tokenizer),
+        'transformers': transformers.__version__,
+        'max_length': max_length,
+        'packing': packing,
+        'format': TOKENIZED_FORMAT_VERSION,
+    }, sort_keys=True)
+    return TOKENIZED_CACHE_DIR / hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+
+def load_or_prepare_dataset(entries, tokenizer, max_length=512, packing=False, use_cache=True,
+                            split=SPLIT_TRAIN, data_hash=None):
+    """
+    Charge le dataset tokenisé depuis le cache disque, ou le prépare et le sauvegarde
+    Les relances (et les balayages d'hyperparamètres) sautent ainsi la tokenisation
+    Le cache est écrit dans un dossier temporaire puis renommé : une sauvegarde
+    interrompue ne laisse jamais un dataset partiel sous le nom définitif
+    """
+    # Sans cache, inutile de hacher le fichier de données
+    cache_path = get_tokenized_cache_path(tokenizer, max_length, packing, split, data_hash) if use_cache else None
+    if use_cache and cache_path.exists():
+        start = time.perf_counter()
+        dataset = load_from_disk(str(cache_path))
+        print(f"   Dataset tokenise charge depuis le cache ({len(dataset)} sequences, "
+              f"{time.perf_counter() - start:.1f}s) : {cache_path.name}")
+        return dataset
+    
+    if packing:
+        dataset = prepare_packed_dataset(entries, tokenizer, max_length=max_length)
+    else:
+        dataset = prepare_dataset(entries, tokenizer, max_length=max_length)
+    
+    if use_cache:
+        tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        dataset.save_to_disk(str(tmp_path))
+        os.replace(tmp_path, cache_path)
+        print(f"   Dataset tokenise mis en cache : {cache_path}")
+    return dataset
+
 def main():
     """Fonction principale"""
     print("="*60)
@@ -110,41 +639,31 @@ def main():
     
     print(f"   {len(entries)} entrees chargees")
     
+    # Périphérique et précision
+    device = resolve_device(model_config)
+    precision = resolve_precision(training_config, device)
+    base_model = model_config['base_model']
+    if device == 'cpu':
+        # Sur CPU, un petit modèle par défaut (un 7B est inutilisable)
+        base_model = model_config.get('cpu_base_model', base_model)
+        num_threads = training_config.get('num_threads') or os.cpu_count() or 1
+        torch.set_num_threads(num_threads)
+        print(f"\n   Mode CPU : {num_threads} threads, precision {precision}")
+    else:
+        print(f"\n   Mode GPU : precision {precision}")
+    
     # Charger le tokenizer et le modèle
-    print(f"\n[2/6] Chargement du modele : {model_config['base_model']}...")
+    print(f"\n[2/6] Chargement du modele : {base_model}...")
     print("   (Cela peut prendre quelques minutes...)")
     
-    tokenizer = AutoTokenizer.from_pretrained(model_config['base_model'])
+    tokenizer = AutoTokenizer.from_pretrained(base_model)
     
     # Ajouter un pad_token si nécessaire
     if tokenizer.pad_token is None:
         tokenizer.pad_token = tokenizer.eos_token
     
-    # Charger le modèle avec quantization si activé
-    if model_config.get('use_quantization', False):
-        print("   Utilisation de la quantization 4-bit...")
-        from transformers import BitsAndBytesConfig
-        
-        bnb_config = BitsAndBytesConfig(
-            load_in_4bit=True,
-            bnb_4bit_use_double_quant=True,
-            bnb_4bit_quant_type="nf4",
-            bnb_4bit_compute_dtype=torch.float16
-        )
-        
-        model = AutoModelForCausalLM.from_pretrained(
-            model_config['base_model'],
-            quantization_config=bnb_config,
-            device_map="auto",
-            trust_remote_code=True
-        )
-    else:
-        model = AutoModelForCausalLM.from_pretrained(
-            model_config['base_model'],
-            torch_dtype=torch.float16,
-            device_map="auto",
-            trust_remote_code=True
-        )
+    # Charger le modèle avec quantization si activé (GPU uniquement)
+    model, quantized = load_model(base_model, model_config, device, precision)
     
     print("   Modele charge")
     
@@ -152,8 +671,11 @@ def main():
     if model_config.get('use_lora', False):
         print(f"\n[3/6] Configuration LoRA...")
         
-        if model_config.get('use_quantization', False):
+        if quantized:
             model = prepare_model_for_kbit_training(model)
+        elif training_config.get('gradient_checkpointing', False):
+            # Les gradients doivent traverser les embeddings gelés
+            model.enable_input_require_grads()
         
         lora_config = LoraConfig(
             r=model_config.get('lora_r', 16),
@@ -169,16 +691,32 @@ def main():
     
     # Préparer le dataset
     print(f"\n[4/6] Preparation du dataset...")
-    dataset = prepare_dataset(
-        entries,
-        tokenizer,
-        max_length=training_config.get('max_length', 512)
-    )
-    
-    # Diviser en train/val (90/10)
-    dataset = dataset.train_test_split(test_size=0.1)
-    train_dataset = dataset['train']
-    eval_dataset = dataset['test']
+    packing = training_config.get('packing', False)
+    if packing:
+        max_length = training_config.get('packing_length', training_config.get('max_length', 512))
+    else:
+        max_length = training_config.get('max_length', 512)
+    
+    # Diviser en train/val (~90/10) par mot français : découpage stable d'un lancement
+    # à l'autre, sans qu'un même mot apparaisse des deux côtés
+    train_entries, eval_entries = split_entries(entries)
+    resume = training_config.get('resume', True)
+    use_cache = training_config.get('cache_tokenized', True)
+    # Hash des données calculé une fois : clé du cache et signature des checkpoints
+    data_hash = hash_file(DATA_DIR / "training_data_cleaned.json")
+    datasets = {}
+    for split, part_entries in ((SPLIT_TRAIN, train_entries), (SPLIT_EVAL, eval_entries)):
+        datasets[split] = load_or_prepare_dataset(
+            part_entries,
+            tokenizer,
+            max_length=max_length,
+            packing=packing,
+            use_cache=use_cache,
+            split=split,
+            data_hash=data_hash
+        )
+    train_dataset = datasets[SPLIT_TRAIN]
+    eval_dataset = datasets[SPLIT_EVAL]
     
     print(f"   Train: {len(train_dataset)} exemples")
     print(f"   Validation: {len(eval_dataset)} exemples")
@@ -189,44 +727,67 @@ def main():
     output_dir = MODELS_DIR / training_config['output_dir']
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    training_args = TrainingArguments(
-        output_dir=str(output_dir),
-        num_train_epochs=training_config.get('num_train_epochs', 3),
-        per_device_train_batch_size=training_config.get('per_device_train_batch_size', 2),
-        gradient_accumulation_steps=training_config.get('gradient_accumulation_steps', 4),
-        learning_rate=training_config.get('learning_rate', 2e-4),
-        warmup_steps=training_config.get('warmup_steps', 100),
-        logging_steps=training_config.get('logging_steps', 100),
-        save_steps=training_config.get('save_steps', 500),
-        eval_steps=training_config.get('eval_steps', 500),
-        evaluation_strategy="steps",
-        save_total_limit=3,
-        load_best_model_at_end=True,
-        fp16=True,
-        report_to="none"
-    )
+    training_args = build_training_arguments(training_config, output_dir, device, precision, packing)
     
-    # Data collator
-    data_collator = DataCollatorForLanguageModeling(
-        tokenizer=tokenizer,
-        mlm=False
-    )
+    # Data collator (padding dynamique par batch, ou séquences empaquetées : simple
+    # empilement, les labels calculés à l'empaquetage gardent les EOS séparateurs)
+    if packing:
+        data_collator = default_data_collator
+    else:
+        data_collator = DataCollatorForLanguageModeling(
+            tokenizer=tokenizer,
+            mlm=False,
+            pad_to_multiple_of=PAD_TO_MULTIPLE_OF
+        )
+    token_stats = TokenStats()
+    data_timer = DataWaitTimer()
+    
+    # Métriques par pas (débit, mémoire, attente des données) dans metrics.jsonl
+    # (en premier : les callbacks suivants sont hors de la mesure du pas)
+    callbacks = [ThroughputMetricsCallback(output_dir, token_stats, data_timer)]
+    
+    # Sauvegardes légères des poids LoRA entre deux checkpoints complets
+    if model_config.get('use_lora', False):
+        callbacks.append(AdapterSnapshotCallback(output_dir, training_config.get('adapter_save_steps', 50)))
+    
+    # Signature écrite dans chaque checkpoint, même sans reprise (resume: false) :
+    # un lancement suivant avec reprise doit pouvoir les reconnaître
+    run_signature = build_run_signature(base_model, data_hash, packing, max_length)
+    callbacks.append(RunSignatureCallback(run_signature))
     
     # Trainer
-    trainer = Trainer(
+    trainer = StatsTrainer(
         model=model,
         args=training_args,
         train_dataset=train_dataset,
         eval_dataset=eval_dataset,
         data_collator=data_collator,
+        callbacks=callbacks,
+        token_stats=token_stats,
+        data_timer=data_timer,
+        packing=packing,
     )
     
+    # Reprise automatique depuis le dernier checkpoint complet
+    resume_checkpoint = None
+    if resume:
+        resume_checkpoint = find_resume_checkpoint(output_dir, run_signature)
+    
     # Entraînement
     print(f"\n[6/6] Debut de l'entrainement...")
     print(f"   Cela peut prendre plusieurs heures selon la configuration")
     print(f"   Surveille la progression ci-dessous...\n")
+    if resume_checkpoint:
+        print(f"   Reprise depuis : {resume_checkpoint}\n")
+    
+    start = time.perf_counter()
+    trainer.train(resume_from_checkpoint=resume_checkpoint)
+    elapsed = time.perf_counter() - start
     
-    trainer.train()
+    print(f"\n   Debit : {token_stats.real_tokens / elapsed:.0f} tokens/s "
+          f"({token_stats.real_tokens} tokens utiles en {elapsed:.0f}s)")
+    print(f"   Padding : {token_stats.padding_ratio:.1%} des tokens calcules")
+    print(f"   Metriques par pas : {output_dir / METRICS_FILE}")
     
     # Sauvegarder le modèle final
     print(f"\nSauvegarde du modele final...")